@@ -0,0 +1,244 @@
+import logging
+import math
+import time
+import numpy as np
+from config import (
+    ANALYTICS_ROLLING_WINDOW, ANALYTICS_MAX_POINTS, ANALYTICS_MAX_ORDER,
+    DICE_MIN, DICE_MAX, NUM_DICE, TAI_MIN
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Cột đọc từ game_history: id (con trỏ đọc tiếp), rồi kết quả dạng số (1 = Tài) và xúc xắc
+ANALYTICS_COLUMNS = "id, result = 'Tài', total_value, dice1, dice2, dice3"
+TAI, TOTAL, DICE = 0, 1, slice(2, 2 + NUM_DICE)
+
+FACES = np.arange(DICE_MIN, DICE_MAX + 1)
+# Phân phối tổng điểm của xúc xắc cân đối: tích chập số mặt NUM_DICE lần
+TOTAL_PROBABILITIES = np.ones(1)
+for _ in range(NUM_DICE):
+    TOTAL_PROBABILITIES = np.convolve(TOTAL_PROBABILITIES, np.ones(len(FACES)) / len(FACES))
+TOTALS = np.arange(NUM_DICE * DICE_MIN, NUM_DICE * DICE_MAX + 1)
+TAI_PROBABILITY = TOTAL_PROBABILITIES[TOTALS >= TAI_MIN].sum()
+
+
+def _chi2_sf(statistic, df):
+    """P(X >= statistic) for a chi-square variable with `df` degrees of freedom."""
+    a, x = df / 2, statistic / 2
+    if x <= 0:
+        return 1.0
+    log_prefactor = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # Chuỗi của hàm gamma không đầy đủ dưới P(a, x)
+        term = total = 1 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefactor))
+    # Phân số liên tục (Lentz) của Q(a, x)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return h * math.exp(log_prefactor)
+
+
+def _chi_square(observed, probabilities):
+    """Pearson chi-square test of observed counts against expected probabilities."""
+    observed = np.asarray(observed, dtype=np.float64)
+    expected = probabilities * observed.sum()
+    statistic = float(((observed - expected) ** 2 / expected).sum())
+    df = len(observed) - 1
+    return {"statistic": round(statistic, 3), "df": df, "p_value": round(_chi2_sf(statistic, df), 6)}
+
+
+def _state_label(key, order):
+    """Key of `order` results (oldest in the high bit) -> e.g. "TTX"."""
+    return "".join("T" if key >> (order - 1 - i) & 1 else "X" for i in range(order))
+
+
+class GameAnalytics:
+    """
+    Vectorized statistics over the full game history.
+
+    Results, totals and dice of every game (archived ones included) are kept
+    in NumPy columns. refresh() appends only the games saved since the last
+    call, and each statistic is computed once and cached until new games
+    arrive. Not thread-safe: callers serialize access.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.last_game_id = 0
+        self.count = 0
+        self._columns = np.empty((2 + NUM_DICE, 0), dtype=np.int8)
+        self._cache = {}
+
+    def refresh(self):
+        """Load the games saved since the last refresh (all of them the first time)."""
+        start = time.perf_counter()
+        batches = [np.array(batch, dtype=np.int64)
+                   for batch in self.db.iter_game_batches(self.last_game_id, columns=ANALYTICS_COLUMNS)]
+        if batches:
+            games = np.concatenate(batches)
+            self.extend(games[:, 1:], int(games[-1, 0]))
+            logger.debug(f"Loaded {len(games)} games for analytics in {time.perf_counter() - start:.2f}s")
+
+    def extend(self, games, last_game_id):
+        """
+        Append an (n, 2 + NUM_DICE) array of rows (is Tài, total, dice...) and
+        drop cached statistics. Columns grow by doubling.
+        """
+        if not len(games):
+            return
+        needed = self.count + len(games)
+        if needed > self._columns.shape[1]:
+            grown = np.empty((self._columns.shape[0], max(needed, 2 * self._columns.shape[1])), dtype=np.int8)
+            grown[:, :self.count] = self._columns[:, :self.count]
+            self._columns = grown
+        self._columns[:, self.count:needed] = games.T
+        self.count = needed
+        self.last_game_id = last_game_id
+        self._cache.clear()
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def _tai(self):
+        return self._columns[TAI, :self.count]
+
+    def summary(self):
+        """Game count and Tài/Xỉu split."""
+        def compute():
+            tai = int(np.count_nonzero(self._tai))
+            return {"total_games": self.count, "Tài": tai, "Xỉu": self.count - tai}
+        return self._cached("summary", compute)
+
+    def streaks(self):
+        """Distribution of run lengths (cầu bệt) per result, longest runs and the current run."""
+        def compute():
+            tai = self._tai
+            if not self.count:
+                return {"Tài": {}, "Xỉu": {}, "longest": {"Tài": 0, "Xỉu": 0}, "current": None}
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(tai)) + 1))
+            lengths = np.diff(np.append(starts, self.count))
+            run_is_tai = tai[starts].astype(bool)
+            streaks = {}
+            longest = {}
+            for name, runs in (("Tài", lengths[run_is_tai]), ("Xỉu", lengths[~run_is_tai])):
+                counts = np.bincount(runs)
+                streaks[name] = {int(length): int(counts[length]) for length in np.flatnonzero(counts)}
+                longest[name] = int(runs.max()) if len(runs) else 0
+            streaks["longest"] = longest
+            streaks["current"] = {"result": "Tài" if run_is_tai[-1] else "Xỉu", "length": int(lengths[-1])}
+            return streaks
+        return self._cached("streaks", compute)
+
+    def transitions(self, order=1):
+        """
+        Transition matrix from the last `order` results to the next one:
+        for each state (e.g. "TX", oldest first) its count and next-result split.
+        """
+        if not 1 <= order <= ANALYTICS_MAX_ORDER:
+            raise ValueError(f"order must be between 1 and {ANALYTICS_MAX_ORDER}")
+
+        def compute():
+            tai = self._tai.astype(np.int64)
+            # Số trạng thái có ván tiếp theo (0 khi lịch sử không dài hơn order)
+            n = max(self.count - order, 0)
+            states = np.zeros(n, dtype=np.int64)
+            for i in range(order):
+                states = states << 1 | tai[i:i + n]
+            counts = np.bincount(states << 1 | tai[order:], minlength=2 << order).reshape(-1, 2)
+            matrix = {}
+            for key, (next_xiu, next_tai) in enumerate(counts.tolist()):
+                seen = next_xiu + next_tai
+                matrix[_state_label(key, order)] = {
+                    "count": seen,
+                    "next": {"Tài": next_tai, "Xỉu": next_xiu},
+                    "tai_rate": round(next_tai / seen * 100, 2) if seen else None,
+                }
+            return {"order": order, "states": matrix}
+        return self._cached(("transitions", order), compute)
+
+    def rolling_tai_rate(self, window=ANALYTICS_ROLLING_WINDOW, points=ANALYTICS_MAX_POINTS):
+        """Tài rate (%) over a sliding window of games, sampled at up to `points` evenly spaced games."""
+        if window < 1:
+            raise ValueError("window must be positive")
+        points = max(1, min(points, ANALYTICS_MAX_POINTS))
+
+        def compute():
+            if self.count < window:
+                return {"window": window, "games": [], "tai_rate": []}
+            sums = np.concatenate(([0], np.cumsum(self._tai, dtype=np.int64)))
+            rates = (sums[window:] - sums[:-window]) * (100 / window)
+            sampled = np.unique(np.linspace(0, len(rates) - 1, points).round().astype(np.int64))
+            return {
+                "window": window,
+                "games": (sampled + window).tolist(),  # Số thứ tự của ván cuối trong cửa sổ
+                "tai_rate": rates[sampled].round(2).tolist(),
+            }
+        return self._cached(("rolling", window, points), compute)
+
+    def _total_counts(self):
+        return np.bincount(self._columns[TOTAL, :self.count], minlength=TOTALS[-1] + 1)[TOTALS[0]:]
+
+    def _face_counts(self):
+        return np.bincount(self._columns[DICE, :self.count].ravel(), minlength=DICE_MAX + 1)[DICE_MIN:]
+
+    def totals(self):
+        """Observed vs. expected frequency of every total and every dice face."""
+        def compute():
+            total_counts = self._total_counts()
+            face_counts = self._face_counts()
+            return {
+                "totals": {
+                    int(total): {"count": int(count), "expected": round(float(p) * self.count, 1)}
+                    for total, count, p in zip(TOTALS, total_counts, TOTAL_PROBABILITIES)
+                },
+                "faces": {
+                    int(face): {"count": int(count), "expected": round(self.count * NUM_DICE / len(FACES), 1)}
+                    for face, count in zip(FACES, face_counts)
+                },
+            }
+        return self._cached("totals", compute)
+
+    def fairness(self):
+        """
+        Chi-square goodness-of-fit of dice faces, totals and Tài/Xỉu against
+        fair dice; a small p_value means the results are unlikely to be fair.
+        """
+        def compute():
+            if not self.count:
+                return {"faces": None, "totals": None, "result": None}
+            tai = int(np.count_nonzero(self._tai))
+            return {
+                "faces": _chi_square(self._face_counts(), np.full(len(FACES), 1 / len(FACES))),
+                "totals": _chi_square(self._total_counts(), TOTAL_PROBABILITIES),
+                "result": _chi_square([self.count - tai, tai],
+                                      np.array([1 - TAI_PROBABILITY, TAI_PROBABILITY])),
+            }
+        return self._cached("fairness", compute)
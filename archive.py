@@ -0,0 +1,154 @@
+import logging
+from config import (
+    ARCHIVE_DATABASE_PATH, ARCHIVE_MAX_AGE_DAYS, ARCHIVE_KEEP_GAMES, ARCHIVE_BATCH_SIZE
+)
+from connection_pool import ConnectionPool
+from history_queries import query_game_history, query_player_bet_history, query_game_results
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bảng trong archive có cùng cột với database chính (sau migration 9)
+ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS game_history (
+        id INTEGER PRIMARY KEY,
+        seed TEXT NOT NULL,
+        md5_hash TEXT NOT NULL,
+        total_value INTEGER NOT NULL,
+        result TEXT NOT NULL,
+        created_at TIMESTAMP,
+        dice1 INTEGER NOT NULL,
+        dice2 INTEGER NOT NULL,
+        dice3 INTEGER NOT NULL,
+        round_id TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS bet_history (
+        id INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        game_id INTEGER NOT NULL,
+        bet_amount INTEGER NOT NULL,
+        bet_type TEXT NOT NULL,
+        result TEXT NOT NULL,
+        win_amount INTEGER NOT NULL,
+        created_at TIMESTAMP
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_bet_history_user_id ON bet_history (user_id, id DESC)",
+]
+
+# Cột được thêm sau khi archive đã có thể tồn tại: (bảng, cột, kiểu) - archive cũ được ALTER khi mở
+ARCHIVE_ADDED_COLUMNS = [
+    ("game_history", "round_id", "TEXT"),  # migration 9
+]
+
+GAME_ARCHIVE_COLUMNS = "id, seed, md5_hash, total_value, result, created_at, dice1, dice2, dice3, round_id"
+BET_ARCHIVE_COLUMNS = "id, user_id, game_id, bet_amount, bet_type, result, win_amount, created_at"
+
+class HistoryArchive:
+    """
+    Cold storage for old game_history and bet_history rows, kept in a separate
+    SQLite file so the hot database stays small.
+    """
+
+    def __init__(self, path=ARCHIVE_DATABASE_PATH):
+        self.path = path
+        self.pool = ConnectionPool(path)
+
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in ARCHIVE_SCHEMA:
+                conn.execute(statement)
+            for table, column, column_type in ARCHIVE_ADDED_COLUMNS:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    logger.info(f"Added {table}.{column} to archive {path}")
+            conn.commit()
+
+    def store(self, games, bets):
+        """Copy raw game and bet rows into the archive (idempotent)."""
+        with self.pool.writer() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO game_history ({GAME_ARCHIVE_COLUMNS}) "
+                f"VALUES ({', '.join('?' * len(GAME_ARCHIVE_COLUMNS.split(', ')))})",
+                [tuple(game[column] for column in GAME_ARCHIVE_COLUMNS.split(", ")) for game in games]
+            )
+            conn.executemany(
+                f"INSERT OR IGNORE INTO bet_history ({BET_ARCHIVE_COLUMNS}) "
+                f"VALUES ({', '.join('?' * len(BET_ARCHIVE_COLUMNS.split(', ')))})",
+                [tuple(bet[column] for column in BET_ARCHIVE_COLUMNS.split(", ")) for bet in bets]
+            )
+            conn.commit()
+
+    def get_game_history(self, limit, before_id=None, after_id=None):
+        """Get a page of archived games, newest first."""
+        with self.pool.reader() as conn:
+            return query_game_history(conn, limit, before_id, after_id)
+
+    def get_player_bet_history(self, user_id, limit, before_id=None, after_id=None):
+        """Get a page of a player's archived bets, newest first."""
+        with self.pool.reader() as conn:
+            return query_player_bet_history(conn, user_id, limit, before_id, after_id)
+
+    def get_game_results(self, after_id, limit, columns="id, result"):
+        """Read archived game rows after `after_id`, oldest first (see query_game_results)."""
+        with self.pool.reader() as conn:
+            return query_game_results(conn, after_id, limit, columns)
+
+    def get_stats_counts(self):
+        """Count archived games by result, dice face and total (for rebuilding rollups)."""
+        with self.pool.reader() as conn:
+            results = conn.execute(
+                "SELECT result, COUNT(*) FROM game_history GROUP BY result"
+            ).fetchall()
+            faces = conn.execute(
+                """SELECT face, COUNT(*) FROM (
+                       SELECT dice1 AS face FROM game_history
+                       UNION ALL SELECT dice2 FROM game_history
+                       UNION ALL SELECT dice3 FROM game_history
+                   ) GROUP BY face"""
+            ).fetchall()
+            totals = conn.execute(
+                "SELECT total_value, COUNT(*) FROM game_history GROUP BY total_value"
+            ).fetchall()
+        return [tuple(row) for row in results], [tuple(row) for row in faces], [tuple(row) for row in totals]
+
+    def close(self):
+        """Close the archive's connections."""
+        self.pool.close()
+
+
+def archive_history(db, archive, max_age_days=ARCHIVE_MAX_AGE_DAYS,
+                    keep_games=ARCHIVE_KEEP_GAMES, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move games older than `max_age_days`, or beyond the newest `keep_games`,
+    together with their bets, from the hot database into the archive.
+
+    Each batch is first committed to the archive and only then deleted from the
+    hot database, so an interruption can at worst leave rows in both places
+    (reads de-duplicate them and the next run finishes the move). Rollups and
+    player aggregates are untouched - they already count the archived rows.
+    Returns the number of games moved.
+    """
+    cutoff_id = db.get_archive_cutoff(max_age_days, keep_games)
+    if cutoff_id is None:
+        logger.info("Nothing to archive")
+        return 0
+
+    moved = 0
+    while True:
+        games, bets = db.read_history_batch(cutoff_id, batch_size)
+        if not games:
+            break
+
+        archive.store(games, bets)
+        db.delete_history_range(games[0]['id'], games[-1]['id'])
+        moved += len(games)
+        logger.info(f"Archived {moved} games (up to id {games[-1]['id']})")
+
+    return moved
@@ -0,0 +1,87 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import HISTORY_SIZE, LEADERBOARD_SIZE, DB_EXECUTOR_WORKERS
+from database import Database
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class AsyncDatabase:
+    """
+    Awaitable facade over Database for code running on the bot's event loop.
+
+    Reads run on a dedicated thread pool and writes are awaited on the
+    database's single writer thread, so a slow query or commit never blocks
+    heartbeats or other channels' countdowns. The method surface mirrors
+    Database.
+    """
+
+    def __init__(self, database=None, max_workers=DB_EXECUTOR_WORKERS):
+        self.database = database or Database()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking function on the database executor and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def write(self, operation, *args):
+        """Queue a write on Database's writer thread and await its group commit."""
+        return await asyncio.wrap_future(self.database.submit(operation, *args))
+
+    async def get_or_create_player(self, user_id, username):
+        return await self.run(self.database.get_or_create_player, user_id, username)
+
+    async def update_player_balance(self, user_id, amount_change):
+        return await self.write("update_player_balance", user_id, amount_change)
+
+    async def reserve_funds(self, user_id, amount):
+        return await self.write("reserve_funds", user_id, amount)
+
+    async def get_player_balance(self, user_id):
+        return await self.run(self.database.get_player_balance, user_id)
+
+    async def get_player_stats(self, user_id):
+        return await self.run(self.database.get_player_stats, user_id)
+
+    async def save_game_result(self, seed, md5_hash, dice_values, total_value, result):
+        return await self.write("save_game_result", seed, md5_hash, dice_values, total_value, result)
+
+    async def save_bet(self, user_id, game_id, bet_amount, bet_type, result, win_amount):
+        return await self.write("save_bet", user_id, game_id, bet_amount, bet_type, result, win_amount)
+
+    async def settle_game(self, seed, md5_hash, dice_values, total_value, result, bets, round_id=None):
+        settled = await self.write("settle_game", seed, md5_hash, dice_values, total_value, result, bets,
+                                   round_id)
+        # Giao dịch đã commit: lỗi khi làm mới cache bảng xếp hạng không được đổi kết quả thanh toán
+        try:
+            await self.run(self.database.refresh_leaderboard_cache)
+        except Exception as e:
+            logger.error(f"Error refreshing leaderboard cache after settlement: {e}")
+        return settled
+
+    async def get_leaderboard(self, limit=LEADERBOARD_SIZE, after_balance=None, after_user_id=None):
+        return await self.run(self.database.get_leaderboard, limit, after_balance, after_user_id)
+
+    async def get_player_rank(self, user_id):
+        return await self.run(self.database.get_player_rank, user_id)
+
+    async def get_game_history(self, limit=HISTORY_SIZE, before_id=None, after_id=None, include_archive=False):
+        return await self.run(self.database.get_game_history, limit, before_id, after_id, include_archive)
+
+    async def get_player_bet_history(self, user_id, limit=HISTORY_SIZE, before_id=None, after_id=None,
+                                     include_archive=False):
+        return await self.run(self.database.get_player_bet_history, user_id, limit, before_id, after_id,
+                              include_archive)
+
+    async def get_stats(self):
+        return await self.run(self.database.get_stats)
+
+    def close(self):
+        """Wait for queued queries to finish, then close the database."""
+        self._executor.shutdown(wait=True)
+        self.database.close()
@@ -0,0 +1,120 @@
+"""
+Benchmark: NumPy analytics over the full result history.
+
+Generates TOTAL_GAMES games with fair dice, checks GameAnalytics against
+plain Python loops on the first CHECK_GAMES of them, then times every
+statistic from a cold cache over all games, a cached call, and loading
+the games from a temporary SQLite database with refresh().
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_analytics
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from analytics import GameAnalytics
+from config import TAI_MIN
+from database import Database
+
+TOTAL_GAMES = 1_000_000
+CHECK_GAMES = 5_000
+
+
+def make_games(rng, count):
+    dice = rng.integers(1, 7, size=(count, 3))
+    totals = dice.sum(axis=1)
+    return np.column_stack([totals >= TAI_MIN, totals, dice]).astype(np.int8)
+
+
+def check(games):
+    analytics = GameAnalytics()
+    analytics.extend(games, len(games))
+    results = games[:, 0].tolist()
+
+    runs = []
+    for result in results:
+        if runs and runs[-1][0] == result:
+            runs[-1][1] += 1
+        else:
+            runs.append([result, 1])
+    for bit, name in ((1, "Tài"), (0, "Xỉu")):
+        expected = {}
+        for result, length in runs:
+            if result == bit:
+                expected[length] = expected.get(length, 0) + 1
+        if analytics.streaks()[name] != expected:
+            raise AssertionError(f"Streak distribution of {name} differs")
+
+    pairs = {}
+    for previous, following in zip(results, results[1:]):
+        pairs[previous, following] = pairs.get((previous, following), 0) + 1
+    for label, previous in (("T", 1), ("X", 0)):
+        state = analytics.transitions(1)["states"][label]
+        if state["next"] != {"Tài": pairs.get((previous, 1), 0), "Xỉu": pairs.get((previous, 0), 0)}:
+            raise AssertionError(f"Transitions from {label} differ")
+
+    window = 100
+    rolling = analytics.rolling_tai_rate(window, 50)
+    for game, rate in zip(rolling["games"], rolling["tai_rate"]):
+        if round(sum(results[game - window:game]) * 100 / window, 2) != rate:
+            raise AssertionError(f"Rolling rate at game {game} differs")
+
+
+def timed(compute):
+    start = time.perf_counter()
+    compute()
+    return (time.perf_counter() - start) * 1000
+
+
+def load_from_sqlite(games):
+    """Write the games into a temporary database and time GameAnalytics.refresh()."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"), archive_path=None)
+        with db.writer() as conn:
+            conn.executemany(
+                """INSERT INTO game_history (seed, md5_hash, dice1, dice2, dice3, total_value, result)
+                   VALUES ('', '', ?, ?, ?, ?, ?)""",
+                ((d1, d2, d3, total, "Tài" if tai else "Xỉu") for tai, total, d1, d2, d3 in games.tolist())
+            )
+            conn.commit()
+        analytics = GameAnalytics(db)
+        load_ms = timed(analytics.refresh)
+        db.close()
+    return analytics.count, load_ms
+
+
+def main():
+    rng = np.random.default_rng(25)
+    games = make_games(rng, TOTAL_GAMES)
+    check(games[:CHECK_GAMES])
+    print(f"check: streaks, transitions and rolling rate match Python loops on {CHECK_GAMES:,} games")
+
+    analytics = GameAnalytics()
+    analytics.extend(games, TOTAL_GAMES)
+    statistics = {
+        "streaks": analytics.streaks,
+        "transitions(1)": lambda: analytics.transitions(1),
+        "transitions(6)": lambda: analytics.transitions(6),
+        "rolling_tai_rate": analytics.rolling_tai_rate,
+        "totals": analytics.totals,
+        "fairness": analytics.fairness,
+    }
+    print(f"{TOTAL_GAMES:,} games, cold cache")
+    total_ms = 0
+    for name, compute in statistics.items():
+        elapsed = timed(compute)
+        total_ms += elapsed
+        print(f"{name:<18} {elapsed:>8.1f} ms")
+    print(f"{'all':<18} {total_ms:>8.1f} ms")
+    print(f"{'cached call':<18} {timed(analytics.fairness) * 1000:>8.1f} us")
+    print(f"fairness: {analytics.fairness()}")
+
+    count, load_ms = load_from_sqlite(games)
+    print(f"refresh() from SQLite: {count:,} games in {load_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: write throughput with one commit per write vs. group commit.
+
+N threads call Database.save_bet concurrently. The baseline replaces the
+writer with one that commits every operation on its own (max_batch=1).
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_group_commit
+"""
+import os
+import tempfile
+import threading
+import time
+
+from database import Database
+from db_writer import DatabaseWriter
+
+THREAD_COUNTS = [1, 8, 32]
+WRITES_PER_THREAD = 200
+
+
+def run(thread_count, group_commit):
+    """Return (writes per second, commits) for thread_count concurrent writers."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        if not group_commit:
+            db.write_queue.close()
+            db.write_queue = DatabaseWriter(db.pool, window=0, max_batch=1)
+
+        user_ids = [str(i) for i in range(thread_count)]
+        for user_id in user_ids:
+            db.get_or_create_player(user_id, f"player_{user_id}")
+        game_id = db.save_game_result("seed", "hash", [6, 5, 4], 15, "Tài")
+        commits_before = db.write_queue.commits
+
+        def worker(user_id):
+            for _ in range(WRITES_PER_THREAD):
+                db.save_bet(user_id, game_id, 10000, "Tài", "win", 20000)
+
+        threads = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        commits = db.write_queue.commits - commits_before
+        db.close()
+    return thread_count * WRITES_PER_THREAD / elapsed, commits
+
+
+def main():
+    print(f"{'threads':>7} {'per-write (ops/s)':>18} {'commits':>8} {'grouped (ops/s)':>16} {'commits':>8}")
+    for thread_count in THREAD_COUNTS:
+        single_rate, single_commits = run(thread_count, group_commit=False)
+        group_rate, group_commits = run(thread_count, group_commit=True)
+        print(f"{thread_count:>7} {single_rate:>18,.0f} {single_commits:>8} {group_rate:>16,.0f} {group_commits:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: history query latency as game_history and bet_history grow.
+
+The database is grown step by step (10k, 100k, 1M rows by default) and at
+each size the current read APIs are timed against the old created_at-ordered
+queries, which have no index to use and scan the whole table.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_history_queries
+    python -m benchmarks.bench_history_queries --max-rows 10000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from database import Database
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+PLAYERS = 1000
+BATCH_SIZE = 50_000
+
+OLD_GAME_QUERY = "SELECT * FROM game_history ORDER BY created_at DESC LIMIT 50"
+OLD_BET_QUERY = """SELECT bh.*, gh.dice1, gh.dice2, gh.dice3, gh.total_value, gh.result as game_result
+                   FROM bet_history bh
+                   JOIN game_history gh ON bh.game_id = gh.id
+                   WHERE bh.user_id = ?
+                   ORDER BY bh.created_at DESC LIMIT 50"""
+
+
+def grow(db, start, stop):
+    """Insert games (and one bet per game) with ids in [start, stop)."""
+    with db.writer() as conn:
+        for batch_start in range(start, stop, BATCH_SIZE):
+            batch_stop = min(batch_start + BATCH_SIZE, stop)
+            games = []
+            bets = []
+            for game_id in range(batch_start + 1, batch_stop + 1):
+                dice = [random.randint(1, 6) for _ in range(3)]
+                total = sum(dice)
+                result = "Tài" if total >= 11 else "Xỉu"
+                games.append((game_id, "seed", "hash", *dice, total, result))
+                bets.append((str(random.randrange(PLAYERS)), game_id, 10000, result, "win", 20000))
+            conn.executemany(
+                "INSERT INTO game_history (id, seed, md5_hash, dice1, dice2, dice3, total_value, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                games
+            )
+            conn.executemany(
+                "INSERT INTO bet_history (user_id, game_id, bet_amount, bet_type, result, win_amount) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                bets
+            )
+            conn.commit()
+
+
+def timed(fn, repeat):
+    """Return the median time (in ms) of calling fn."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def old_query(db, sql, params=()):
+    with db.reader() as conn:
+        conn.execute(sql, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        rows = 0
+        user_id = "42"
+
+        print(f"{'rows':>10} {'games (ms)':>11} {'bets (ms)':>10} {'old games (ms)':>15} {'old bets (ms)':>14}")
+        for size in SIZES:
+            if size > args.max_rows:
+                break
+            grow(db, rows, size)
+            rows = size
+
+            games = timed(lambda: db.get_game_history(50), 50)
+            bets = timed(lambda: db.get_player_bet_history(user_id, 50), 50)
+            old_games = timed(lambda: old_query(db, OLD_GAME_QUERY), 3)
+            old_bets = timed(lambda: old_query(db, OLD_BET_QUERY, (user_id,)), 3)
+            print(f"{rows:>10,} {games:>11.3f} {bets:>10.3f} {old_games:>15.1f} {old_bets:>14.1f}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: warm-restart time from the round journal.
+
+Writes a journal with TOTAL_BETS accepted bets spread over ROUND_COUNT
+rounds (SETTLED_SHARE of them already settled, players raising their bets
+a few times), then times what TaiXiuGame does on startup: replay the
+journal, compact it, sum the stakes to keep reserved, and rebuild the
+open Session objects with their bets.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_journal_recovery
+"""
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from journal import RoundJournal
+from sessions import SessionRegistry, Bet
+
+TOTAL_BETS = 50_000
+ROUND_COUNT = 500
+SETTLED_SHARE = 0.5
+RAISES_PER_PLAYER = 2
+
+
+def write_journal(path):
+    journal = RoundJournal(path)
+    deadline = time.time() + 30
+    bets_per_round = TOTAL_BETS // ROUND_COUNT
+    players_per_round = bets_per_round // RAISES_PER_PLAYER
+    for r in range(ROUND_COUNT):
+        session_id = f"session_{r}_0"
+        journal.record_open(session_id, r, 10**17 + r, deadline)
+        for raise_no in range(1, RAISES_PER_PLAYER + 1):
+            for p in range(players_per_round):
+                user_id = str(10**17 + r * players_per_round + p)
+                bet = Bet(user_id, f"player_{p}", 10000 * raise_no, "Tài" if p % 2 else "Xỉu", None)
+                journal.record_bet(session_id, bet)
+        if r < ROUND_COUNT * SETTLED_SHARE:
+            journal.record_settle(session_id)
+    journal.close()
+
+
+def recover(path):
+    """The startup path of TaiXiuGame: replay, compact, reservations, sessions."""
+    journal = RoundJournal(path)
+    rounds = journal.replay()
+    journal.compact(rounds)
+
+    reserved = {}
+    for round_info in rounds.values():
+        for record in round_info["bets"].values():
+            reserved[record["user"]] = reserved.get(record["user"], 0) + record["amount"]
+
+    registry = SessionRegistry()
+    now = time.monotonic()
+    for session_id, round_info in rounds.items():
+        session = registry.open(round_info["channel"], now + max(round_info["deadline"] - time.time(), 0),
+                                session_id=session_id)
+        for record in round_info["bets"].values():
+            session.set_bet(Bet(record["user"], record["username"], record["amount"],
+                                record["type"], datetime.now()))
+    journal.close()
+    return registry, reserved
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rounds.journal")
+        write_journal(path)
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        registry, reserved = recover(path)
+        elapsed = time.perf_counter() - start
+
+        open_bets = sum(len(session.bets) for session in registry)
+        print(f"journal: {TOTAL_BETS:,} bet records, {ROUND_COUNT:,} rounds, {size / 1e6:.1f} MB")
+        print(f"recovered {len(registry):,} open rounds, {open_bets:,} bets, "
+              f"{len(reserved):,} reservations in {elapsed * 1000:.0f} ms")
+        print(f"compacted journal: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Latency check: does the event loop stay responsive while a slow query runs?
+
+A ticker coroutine wakes every TICK seconds and records how late it was.
+The same slow query is run once directly on the loop (the old behaviour)
+and once through AsyncDatabase. Exits with status 1 if the facade lets
+the loop stall for longer than MAX_LAG.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_loop_latency
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from async_database import AsyncDatabase
+from database import Database
+
+TICK = 0.005
+MAX_LAG = 0.05
+SLOW_QUERY = """WITH RECURSIVE counter(x) AS (
+                    SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 3000000
+                ) SELECT SUM(x) FROM counter"""
+
+
+def slow_query(db):
+    with db.reader() as conn:
+        return conn.execute(SLOW_QUERY).fetchone()[0]
+
+
+async def ticker(stop, lags):
+    """Sleep TICK at a time and record how much later than expected each wake-up is."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - expected)
+
+
+async def measure(run_query):
+    """Return (query seconds, worst loop lag seconds) while run_query executes."""
+    stop = asyncio.Event()
+    lags = []
+    tick_task = asyncio.create_task(ticker(stop, lags))
+    await asyncio.sleep(TICK * 4)
+
+    start = time.perf_counter()
+    await run_query()
+    elapsed = time.perf_counter() - start
+
+    await asyncio.sleep(TICK * 4)
+    stop.set()
+    await tick_task
+    return elapsed, max(lags)
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        adb = AsyncDatabase(Database(os.path.join(tmp, "bench.db")))
+
+        async def blocking():
+            slow_query(adb.database)
+
+        async def facade():
+            await adb.run(slow_query, adb.database)
+
+        blocking_time, blocking_lag = await measure(blocking)
+        facade_time, facade_lag = await measure(facade)
+        adb.close()
+
+    print(f"{'path':<18} {'query (ms)':>11} {'worst loop lag (ms)':>20}")
+    print(f"{'direct (blocking)':<18} {blocking_time * 1000:>11.1f} {blocking_lag * 1000:>20.1f}")
+    print(f"{'AsyncDatabase':<18} {facade_time * 1000:>11.1f} {facade_lag * 1000:>20.1f}")
+
+    if facade_lag > MAX_LAG:
+        print(f"FAIL: loop stalled {facade_lag * 1000:.1f}ms (limit {MAX_LAG * 1000:.0f}ms)")
+        return 1
+    print("OK: the event loop stayed responsive")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,126 @@
+"""
+Benchmark: incremental PatternAnalyzer vs. rescanning the history.
+
+Times append_result + analyze_patterns per game for the incremental
+analyzer and for the old rescanning detectors (kept below as the
+reference) over a history of HISTORY_LENGTH results, with long streaks so
+the old backward scans have real work to do. tests/test_patterns.py checks
+that both return the same thing after every append.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_pattern_analyzer
+"""
+import random
+import time
+
+from patterns import PatternAnalyzer
+
+HISTORY_LENGTH = 20_000
+RESULTS = ("Tài", "Xỉu")
+
+
+def reference_patterns(history):
+    """The detectors as they were before the run-length rewrite (rescan the tail)."""
+    def cau_bet(min_streak=3):
+        if not history:
+            return 0, None
+        streak = 1
+        for i in range(len(history) - 2, -1, -1):
+            if history[i] != history[-1]:
+                break
+            streak += 1
+        return (streak, history[-1]) if streak >= min_streak else (0, None)
+
+    def cau_dao_1_1(min_length=4):
+        if len(history) < min_length:
+            return 0
+        alternating = 1
+        for i in range(len(history) - 2, -1, -1):
+            if history[i] == history[i + 1]:
+                break
+            alternating += 1
+        return alternating if alternating >= min_length else 0
+
+    def cau_3_2_1():
+        if len(history) < 6:
+            return False
+        s = history[-6:]
+        return s[0] == s[1] == s[2] and s[3] == s[4] != s[0] and s[5] != s[3]
+
+    def cau_dao_1_2_3():
+        if len(history) < 6:
+            return False
+        s = history[-6:]
+        a, b = s[0], s[1]
+        return b != a and s == [a, b, b, a, a, a]
+
+    def cau_nhip_nghieng():
+        if len(history) < 12:
+            return False
+        s = history[-12:]
+        a = s[0]
+        b = next((r for r in s if r != a), None)
+        if b is None:
+            return False
+        return s == [a, a, b, a, b, b, a, a, b, b, b, a]
+
+    return {
+        "cau_bet": cau_bet(),
+        "cau_dao_1_1": cau_dao_1_1(),
+        "cau_3_2_1": cau_3_2_1(),
+        "cau_dao_1_2_3": cau_dao_1_2_3(),
+        "cau_nhip_nghieng": cau_nhip_nghieng(),
+    }
+
+
+def builtin_patterns(analyzer):
+    """analyze_patterns() without the custom patterns from config (not in the reference)."""
+    patterns = analyzer.analyze_patterns()
+    patterns.pop("custom")
+    return patterns
+
+
+def random_sequence(rng, length):
+    """Mix fair coin flips with planted runs so the rarer patterns show up too."""
+    sequence = []
+    while len(sequence) < length:
+        result = rng.choice(RESULTS)
+        sequence.extend([result] * (rng.choice((1, 1, 1, 2, 2, 3, 5)) if rng.random() < 0.5 else 1))
+    return sequence[:length]
+
+
+def time_per_game(step, sequence):
+    start = time.perf_counter()
+    for result in sequence:
+        step(result)
+    return (time.perf_counter() - start) / len(sequence) * 1e6
+
+
+def main():
+    rng = random.Random(20)
+
+    # Cầu bệt dài: quét ngược của bản cũ tốn thời gian tỉ lệ với độ dài lượt
+    sequence = []
+    while len(sequence) < HISTORY_LENGTH:
+        sequence.extend([rng.choice(RESULTS)] * rng.randint(1, 200))
+    sequence = sequence[:HISTORY_LENGTH]
+
+    history = []
+    def rescan_step(result):
+        history.append(result)
+        reference_patterns(history)
+
+    analyzer = PatternAnalyzer()
+    def incremental_step(result):
+        analyzer.append_result(result)
+        analyzer.analyze_patterns()
+
+    rescan_us = time_per_game(rescan_step, sequence)
+    incremental_us = time_per_game(incremental_step, sequence)
+    print(f"{HISTORY_LENGTH:,} games, append + analyze_patterns per game:")
+    print(f"{'rescan':<14} {rescan_us:>8.2f} us")
+    print(f"{'incremental':<14} {incremental_us:>8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
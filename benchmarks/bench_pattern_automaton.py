@@ -0,0 +1,102 @@
+"""
+Benchmark: cost of evaluating many cầu patterns at once.
+
+Registers PATTERN_COUNTS random run-length patterns (e.g. "2-1-3-1") in a
+PatternSet, checks its answers against a naive per-pattern comparison of
+the tail, and reports per new result:
+- naive: compare the tail against every pattern (grows with the count),
+- step: PatternAnalyzer.append_result + match_mask (one automaton step),
+- names: the same, plus decoding the matched pattern names,
+- one pass: PatternSet.match over the last HISTORY_SIZE results.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_pattern_automaton
+"""
+import random
+import time
+
+from config import HISTORY_SIZE
+from patterns import PatternSet, PatternAnalyzer
+
+PATTERN_COUNTS = (5, 50, 100, 250, 500)
+GAMES = 20_000
+CHECKED_GAMES = 2_000
+RESULTS = ("Tài", "Xỉu")
+
+
+def random_patterns(rng, count):
+    patterns = []
+    for i in range(count):
+        runs = [rng.randint(1, 4) for _ in range(rng.randint(2, 6))]
+        patterns.append((f"p{i}", "-".join(map(str, runs))))
+    return patterns
+
+
+def naive_match(pattern_set, history):
+    """Compare the tail with each pattern under both A/B mappings."""
+    matched = []
+    for name in pattern_set.names:
+        symbols = pattern_set.specs[name]
+        if len(symbols) > len(history):
+            continue
+        tail = history[-len(symbols):]
+        a = tail[0]
+        if all((result == a) == (symbol == "A") for result, symbol in zip(tail, symbols)):
+            matched.append(name)
+    return matched
+
+
+def per_result_us(step, sequence):
+    start = time.perf_counter()
+    for result in sequence:
+        step(result)
+    return (time.perf_counter() - start) / len(sequence) * 1e6
+
+
+def main():
+    rng = random.Random(22)
+    sequence = [rng.choice(RESULTS) for _ in range(GAMES)]
+
+    print(f"{GAMES:,} results, microseconds per new result")
+    print(f"{'patterns':>8} {'states':>7} {'naive':>9} {'step':>7} {'names':>7} {'one pass':>9}")
+    for count in PATTERN_COUNTS:
+        pattern_set = PatternSet(random_patterns(rng, count))
+
+        analyzer = PatternAnalyzer(patterns=pattern_set)
+        for i, result in enumerate(sequence[:CHECKED_GAMES]):
+            analyzer.append_result(result)
+            history = sequence[max(i + 1 - 30, 0):i + 1]
+            if sorted(analyzer.matched_patterns()) != sorted(naive_match(pattern_set, history)):
+                raise AssertionError(f"Automaton and naive match differ after {i + 1} results")
+
+        history = []
+        def naive_step(result):
+            history.append(result)
+            naive_match(pattern_set, history[-30:])
+
+        stepper = PatternAnalyzer(patterns=pattern_set)
+        def automaton_step(result):
+            stepper.append_result(result)
+            stepper.match_mask()
+
+        analyzer = PatternAnalyzer(patterns=pattern_set)
+        def names_step(result):
+            analyzer.append_result(result)
+            analyzer.matched_patterns()
+
+        tail = []
+        def one_pass_step(result):
+            tail.append(result)
+            del tail[:-HISTORY_SIZE]
+            pattern_set.match(tail)
+
+        naive_us = per_result_us(naive_step, sequence)
+        automaton_us = per_result_us(automaton_step, sequence)
+        names_us = per_result_us(names_step, sequence)
+        one_pass_us = per_result_us(one_pass_step, sequence)
+        print(f"{count:>8} {len(pattern_set.transitions):>7} {naive_us:>9.2f} "
+              f"{automaton_us:>7.2f} {names_us:>7.2f} {one_pass_us:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: historical pattern search over millions of games.
+
+Checks PatternIndex on a short random history against a brute-force scan,
+both when built in one go and when fed game by game, then builds it over
+TOTAL_GAMES results and times search() for random sequences of every
+length up to PATTERN_INDEX_MAX_LENGTH, and append() for new games.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_pattern_index
+"""
+import random
+import time
+
+from config import PATTERN_INDEX_MAX_LENGTH
+from pattern_index import PatternIndex
+from result_history import RESULT_BITS
+
+TOTAL_GAMES = 2_000_000
+CHECK_GAMES = 3_000
+CHECK_QUERIES = 500
+SEARCHES = 20_000
+RESULTS = ("Tài", "Xỉu")
+
+
+def brute_force(bits, pattern):
+    n = len(pattern)
+    ends = [i for i in range(n - 1, len(bits)) if bits[i - n + 1:i + 1] == pattern]
+    following = [bits[i + 1] for i in ends if i + 1 < len(bits)]
+    return {
+        "occurrences": len(ends),
+        "next": {"Tài": following.count(1), "Xỉu": following.count(0)},
+        "last_seen_games_ago": len(bits) - 1 - ends[-1] if ends else None,
+    }
+
+
+def check(rng):
+    results = [rng.choice(RESULTS) for _ in range(CHECK_GAMES)]
+    bits = [RESULT_BITS[result] for result in results]
+
+    built = PatternIndex()
+    built.build(enumerate(results[:CHECK_GAMES // 2], start=1))
+    for game_id, result in enumerate(results[CHECK_GAMES // 2:], start=CHECK_GAMES // 2 + 1):
+        built.append(result, game_id)
+    appended = PatternIndex()
+    for game_id, result in enumerate(results, start=1):
+        appended.append(result, game_id)
+
+    for _ in range(CHECK_QUERIES):
+        pattern = [rng.getrandbits(1) for _ in range(rng.randint(1, PATTERN_INDEX_MAX_LENGTH))]
+        expected = brute_force(bits, pattern)
+        for index in (built, appended):
+            found = index.search(pattern)
+            if {key: found[key] for key in expected} != expected:
+                raise AssertionError(f"Search for {pattern} differs: {found} != {expected}")
+
+
+def main():
+    rng = random.Random(24)
+    check(rng)
+    print(f"check: {CHECK_QUERIES} searches over {CHECK_GAMES:,} games match a brute-force scan")
+
+    games = [(game_id, rng.choice(RESULTS)) for game_id in range(1, TOTAL_GAMES + 1)]
+    index = PatternIndex()
+    start = time.perf_counter()
+    index.build(games)
+    build_seconds = time.perf_counter() - start
+
+    patterns = [[rng.getrandbits(1) for _ in range(rng.randint(1, PATTERN_INDEX_MAX_LENGTH))]
+                for _ in range(SEARCHES)]
+    start = time.perf_counter()
+    for pattern in patterns:
+        index.search(pattern)
+    search_us = (time.perf_counter() - start) / SEARCHES * 1e6
+
+    start = time.perf_counter()
+    for game_id in range(TOTAL_GAMES + 1, TOTAL_GAMES + 10_001):
+        index.append(rng.choice(RESULTS), game_id)
+    append_us = (time.perf_counter() - start) / 10_000 * 1e6
+
+    print(f"{TOTAL_GAMES:,} games, sequences up to {PATTERN_INDEX_MAX_LENGTH} results")
+    print(f"build   {build_seconds:>8.2f} s")
+    print(f"search  {search_us:>8.2f} us")
+    print(f"append  {append_us:>8.2f} us")
+    print(f"example {index.search([1, 1, 1, 0])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: memory of the bit-packed ResultHistory vs. a list of strings.
+
+Stores TOTAL_RESULTS random results in a ResultHistory of the same
+capacity and in a plain list of "Tài"/"Xỉu" (what PatternAnalyzer kept
+before), reports the memory of each (the list holds pointers to two shared
+strings) and times append() and streak(). A small ring buffer is first checked against a
+list for indexing, tail() and streak() after wrapping around.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_result_history
+"""
+import random
+import sys
+import time
+
+from result_history import ResultHistory, RESULT_NAMES
+
+TOTAL_RESULTS = 10_000_000
+CHECK_CAPACITY = 100
+CHECK_RESULTS = 5_000
+
+
+def check_ring(rng):
+    """ResultHistory must behave like the last `capacity` items of a list."""
+    history = ResultHistory(CHECK_CAPACITY)
+    reference = []
+    for _ in range(CHECK_RESULTS):
+        bit = rng.random() < 0.5 if rng.random() < 0.7 else (reference[-1] if reference else 1)
+        history.append(int(bit))
+        reference.append(int(bit))
+        window = reference[-history.capacity:]
+        streak = next((i for i, b in enumerate(reversed(window)) if b != window[-1]), len(window))
+        tail = int("".join(map(str, window[-20:])), 2)
+        if len(history) != len(window) or history[-1] != window[-1] or history[0] != window[0]:
+            raise AssertionError("indexing differs from the reference list")
+        if history.streak() != streak or history.tail(20) != tail:
+            raise AssertionError("streak/tail differs from the reference list")
+
+
+def timed(build):
+    start = time.perf_counter()
+    history = build()
+    return history, time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(23)
+    check_ring(rng)
+    print(f"ring buffer check: {CHECK_RESULTS:,} appends into capacity {CHECK_CAPACITY} match a list")
+
+    bits = [rng.getrandbits(1) for _ in range(TOTAL_RESULTS)]
+    bits[-1000:] = [1] * 1000  # Cầu bệt dài ở cuối để đo streak()
+
+    def build_list():
+        return [RESULT_NAMES[bit] for bit in bits]
+
+    def build_packed():
+        history = ResultHistory(TOTAL_RESULTS)
+        for bit in bits:
+            history.append(bit)
+        return history
+
+    as_list, list_seconds = timed(build_list)
+    list_bytes = sys.getsizeof(as_list)
+    del as_list
+    packed, packed_seconds = timed(build_packed)
+    packed_bytes = sys.getsizeof(packed) + packed.nbytes()
+
+    start = time.perf_counter()
+    streak = packed.streak()
+    streak_us = (time.perf_counter() - start) * 1e6
+
+    print(f"{TOTAL_RESULTS:,} results")
+    print(f"{'layout':<16} {'memory':>10} {'build':>8}")
+    print(f"{'list of str':<16} {list_bytes / 1e6:>8.1f}MB {list_seconds:>7.2f}s")
+    print(f"{'ResultHistory':<16} {packed_bytes / 1e6:>8.2f}MB {packed_seconds:>7.2f}s")
+    print(f"streak() of a {streak}-result run at the end: {streak_us:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: memory per bet with dict-based rounds vs. slotted Session/Bet.
+
+Builds TOTAL_BETS concurrent bets spread over SESSION_COUNT rounds, once
+with the old free-form dicts and once with sessions.Session / sessions.Bet,
+and reports the bytes tracemalloc attributes to each bet.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_session_memory
+"""
+import gc
+import tracemalloc
+from datetime import datetime
+
+from sessions import Session, Bet
+
+TOTAL_BETS = 100_000
+SESSION_COUNT = 1_000
+
+
+def make_player(i):
+    """Player ids and names are created outside the measurement (Discord owns them)."""
+    return str(10**17 + i), f"player_{i}"
+
+
+def build_dicts(players, now):
+    sessions = []
+    for s in range(SESSION_COUNT):
+        sessions.append({
+            "id": f"session_{s}",
+            "channel_id": s,
+            "start_time": now,
+            "deadline": 40.0,
+            "bets": {},
+            "result": None,
+            "dice_values": None,
+            "total": None,
+            "message": None
+        })
+    for i, (user_id, username) in enumerate(players):
+        sessions[i % SESSION_COUNT]["bets"][user_id] = {
+            "amount": 10000 + i,
+            "type": "Tài" if i % 2 else "Xỉu",
+            "username": username,
+            "time": datetime.now()
+        }
+    return sessions
+
+
+def build_slotted(players, now):
+    sessions = [
+        Session(id=f"session_{s}", channel_id=s, start_time=now, deadline=40.0)
+        for s in range(SESSION_COUNT)
+    ]
+    for i, (user_id, username) in enumerate(players):
+        sessions[i % SESSION_COUNT].set_bet(
+            Bet(user_id, username, 10000 + i, "Tài" if i % 2 else "Xỉu", datetime.now())
+        )
+    return sessions
+
+
+def measure(build):
+    """Return bytes allocated per bet (sessions included) by build()."""
+    players = [make_player(i) for i in range(TOTAL_BETS)]
+    now = datetime.now()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = build(players, now)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return (after - before) / TOTAL_BETS
+
+
+def main():
+    dict_bytes = measure(build_dicts)
+    slotted_bytes = measure(build_slotted)
+    print(f"{TOTAL_BETS:,} bets in {SESSION_COUNT:,} sessions")
+    print(f"{'layout':<16} {'bytes/bet':>10}")
+    print(f"{'dict':<16} {dict_bytes:>10.0f}")
+    print(f"{'Session/Bet':<16} {slotted_bytes:>10.0f}")
+    print(f"saved {100 * (1 - slotted_bytes / dict_bytes):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
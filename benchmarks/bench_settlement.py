@@ -0,0 +1,72 @@
+"""
+Benchmark: settling a round bet-by-bet vs. Database.settle_game.
+
+Chạy từ thư mục gốc của repo:
+    python -m benchmarks.bench_settlement
+"""
+import os
+import random
+import tempfile
+import time
+
+from database import Database
+from utils import calculate_winnings
+
+BET_COUNTS = [10, 100, 1000]
+ROUNDS = 3
+
+
+def make_bets(db, count):
+    """Create `count` players and a random bet for each of them."""
+    bets = []
+    for i in range(count):
+        user_id = str(100000 + i)
+        db.get_or_create_player(user_id, f"player_{i}")
+        bets.append((user_id, random.randint(1, 100) * 10000, random.choice(["Tài", "Xỉu"])))
+    return bets
+
+
+def settle_per_bet(db, bets, dice_values, total, result):
+    """The previous settlement path: one commit per statement."""
+    game_id = db.save_game_result("seed", "hash", dice_values, total, result)
+    for user_id, bet_amount, bet_type in bets:
+        winnings = calculate_winnings(bet_amount, bet_type, result)
+        db.update_player_balance(user_id, winnings)
+        db.save_bet(user_id, game_id, bet_amount, bet_type,
+                    "win" if winnings > 0 else "loss", winnings)
+
+
+def settle_bulk(db, bets, dice_values, total, result):
+    """The single-transaction settlement path."""
+    settlements = [
+        (user_id, bet_amount, bet_type, calculate_winnings(bet_amount, bet_type, result))
+        for user_id, bet_amount, bet_type in bets
+    ]
+    db.settle_game("seed", "hash", dice_values, total, result, settlements)
+
+
+def run(settle, count):
+    """Return the best time (in seconds) of settling `count` bets."""
+    best = None
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        bets = make_bets(db, count)
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            settle(db, bets, [6, 5, 4], 15, "Tài")
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        db.close()
+    return best
+
+
+def main():
+    print(f"{'bets':>6} {'per-bet (ms)':>14} {'bulk (ms)':>11} {'speedup':>9}")
+    for count in BET_COUNTS:
+        per_bet = run(settle_per_bet, count)
+        bulk = run(settle_bulk, count)
+        print(f"{count:>6} {per_bet * 1000:>14.1f} {bulk * 1000:>11.1f} {per_bet / bulk:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,9 @@ import asyncio
 import os
 from discord import app_commands
 from discord.ext import commands
-from config import TOKEN, MIN_BET, MAX_BET, DEFAULT_BALANCE
+from config import TOKEN, MIN_BET, MAX_BET, DEFAULT_BALANCE, LEADERBOARD_SIZE
 from game import TaiXiuGame
+from pattern_index import parse_results
 from utils import format_currency
 
 # Set up logging
@@ -34,6 +35,9 @@ class TaiXiuBot(commands.Bot):
         logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
         logger.info(f"Connected to {len(self.guilds)} guilds")
         
+        # Tiếp tục các phiên đang chạy trước khi bot dừng (chỉ lần kết nối đầu tiên)
+        await self.game.recover_rounds()
+        
         # Set bot presence
         await self.change_presence(
             activity=discord.Activity(
@@ -145,13 +149,105 @@ async def so_du(interaction: discord.Interaction):
     username = interaction.user.name
     
     # Get or create player
-    player = bot.game.db.get_or_create_player(user_id, username)
+    player = await bot.game.get_player(user_id, username)
     balance = player["balance"]
+    reserved = player["reserved"]
+    
+    message = f"Số dư của bạn: {format_currency(balance)}"
+    if reserved:
+        message += f"\nĐang giữ cho các cược chưa có kết quả: {format_currency(reserved)}"
+    
+    await interaction.followup.send(message, ephemeral=True)
+
+@bot.tree.command(name="bang_xep_hang", description="Xem bảng xếp hạng người chơi giàu nhất")
+async def bang_xep_hang(interaction: discord.Interaction):
+    """View the leaderboard and your own rank."""
+    # Phản hồi ngay lập tức để tránh lỗi Unknown Interaction (10062)
+    await interaction.response.defer(ephemeral=False)
+    
+    user_id = str(interaction.user.id)
+    top_players = await bot.game.db.get_leaderboard(LEADERBOARD_SIZE)
+    rank = await bot.game.db.get_player_rank(user_id)
     
-    await interaction.followup.send(
-        f"Số dư của bạn: {format_currency(balance)}",
-        ephemeral=True
+    embed = discord.Embed(
+        title="🏆 BẢNG XẾP HẠNG TÀI XỈU 🏆",
+        color=discord.Color.gold()
     )
+    
+    if top_players:
+        lines = [
+            f"**#{position}** {player['username']} - {format_currency(player['balance'])}"
+            for position, player in enumerate(top_players, start=1)
+        ]
+        embed.description = "\n".join(lines)
+    else:
+        embed.description = "Chưa có người chơi nào."
+    
+    if rank is not None:
+        embed.set_footer(text=f"Bạn đang đứng hạng #{rank['rank']:,} với {format_currency(rank['balance'])}")
+    
+    await interaction.followup.send(embed=embed)
+
+@bot.tree.command(name="tim_cau", description="Tìm một chuỗi kết quả trong lịch sử và xem kết quả tiếp theo")
+@app_commands.describe(
+    chuoi="Chuỗi kết quả, cũ nhất trước: T = Tài, X = Xỉu (ví dụ TTXT)"
+)
+async def tim_cau(interaction: discord.Interaction, chuoi: str):
+    """Search the full history for a result sequence."""
+    # Phản hồi ngay lập tức để tránh lỗi Unknown Interaction (10062)
+    await interaction.response.defer(ephemeral=False)
+    
+    try:
+        found = bot.game.pattern_index.search(parse_results(chuoi))
+    except ValueError as e:
+        await interaction.followup.send(str(e), ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title=f"🔍 Chuỗi {' - '.join(found['pattern'])}",
+        description=f"Xuất hiện **{found['occurrences']:,}** lần trong {found['indexed_games']:,} ván",
+        color=discord.Color.purple()
+    )
+    if found["next_tai_rate"] is not None:
+        embed.add_field(
+            name="Ván tiếp theo",
+            value=(
+                f"Tài: {found['next']['Tài']:,} lần ({found['next_tai_rate']}%)\n"
+                f"Xỉu: {found['next']['Xỉu']:,} lần ({round(100 - found['next_tai_rate'], 1)}%)"
+            ),
+            inline=False
+        )
+    if found["last_seen_games_ago"] is not None:
+        embed.set_footer(text=f"Lần gần nhất: {found['last_seen_games_ago']:,} ván trước")
+    
+    await interaction.followup.send(embed=embed)
+
+@bot.tree.command(name="trang_thai", description="Xem trạng thái hàng đợi tin nhắn và bộ nhớ đệm của bot")
+async def trang_thai(interaction: discord.Interaction):
+    """View the game's runtime metrics (dispatch queue depth, player cache)."""
+    # Phản hồi ngay lập tức để tránh lỗi Unknown Interaction (10062)
+    await interaction.response.defer(ephemeral=True)
+    
+    metrics = bot.game.metrics()
+    dispatch = metrics["dispatch"]
+    cache = metrics["player_cache"]
+    
+    embed = discord.Embed(
+        title="📊 Trạng thái bot",
+        description=f"Phiên đang chạy: **{metrics['active_sessions']}**",
+        color=discord.Color.blue()
+    )
+    queue_lines = [f"Đang chờ: {dispatch['depth']} (cao nhất: {dispatch['max_depth']})"]
+    queue_lines.extend(f"- {name}: {count}" for name, count in dispatch["queued"].items())
+    queue_lines.append(f"Đã gửi: {dispatch['sent']:,} | Bỏ qua: {dispatch['dropped']:,} | Lỗi: {dispatch['failed']:,}")
+    embed.add_field(name="Hàng đợi tin nhắn Discord", value="\n".join(queue_lines), inline=False)
+    embed.add_field(
+        name="Bộ nhớ đệm người chơi",
+        value="\n".join(f"{name}: {value:,}" for name, value in cache.items()),
+        inline=False
+    )
+    
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="huong_dan", description="Xem hướng dẫn chơi Tài Xỉu")
 async def huong_dan(interaction: discord.Interaction):
@@ -196,6 +292,9 @@ async def huong_dan(interaction: discord.Interaction):
             "- `/so_du`: Xem số dư của bạn\n"
             "- `/lich_su game`: Xem lịch sử trò chơi\n"
             "- `/lich_su user`: Xem lịch sử cược cá nhân\n"
+            "- `/bang_xep_hang`: Xem bảng xếp hạng\n"
+            "- `/tim_cau TTXT`: Tìm chuỗi kết quả trong lịch sử\n"
+            "- `/trang_thai`: Xem trạng thái hàng đợi tin nhắn của bot\n"
             "- `/huong_dan`: Xem hướng dẫn này"
         ),
         inline=False
@@ -7,7 +7,27 @@ MIN_BET = 10000  # 10k
 MAX_BET = 1000000  # 1 million
 RESET_BALANCE = 1000000  # Amount to reset to when player runs out
 BETTING_WINDOW = 40  # 40 seconds
+RECENT_BETS_SIZE = 10  # Số cược gần nhất hiển thị trong embed của phiên
+EMBED_MIN_EDIT_INTERVAL = 1.5  # Khoảng cách tối thiểu giữa hai lần sửa embed của một phiên (giây)
+DISPATCH_WORKERS = 4  # Số thao tác gửi/sửa tin nhắn Discord chạy đồng thời
+DISPATCH_WARN_DEPTH = 200  # Ghi cảnh báo khi hàng đợi gửi tin nhắn dài đến mức này
 HISTORY_SIZE = 50  # Show 50 most recent results
+RESULT_HISTORY_CAPACITY = 1000000  # Số kết quả tối đa PatternAnalyzer giữ trong bộ nhớ (1 bit/kết quả, ~125KB)
+PATTERN_INDEX_MAX_LENGTH = 16  # Chuỗi dài nhất có thể tra trong lịch sử (/tim_cau, /api/patterns/search)
+RESULT_SCAN_BATCH_SIZE = 50000  # Số ván đọc mỗi lần khi quét toàn bộ lịch sử
+ANALYTICS_ROLLING_WINDOW = 100  # Số ván trong cửa sổ tỉ lệ Tài (/api/analytics/rolling)
+ANALYTICS_MAX_POINTS = 500  # Số điểm tối đa trả về cho một chuỗi số liệu
+ANALYTICS_MAX_ORDER = 6  # Số ván trước tối đa của ma trận chuyển trạng thái
+MAX_PAGE_SIZE = 100  # Số dòng lịch sử tối đa trả về trong một trang
+LEADERBOARD_SIZE = 10  # Số người chơi hiển thị trong /bang_xep_hang
+PLAYER_CACHE_SIZE = 10000  # Số người chơi tối đa giữ trong bộ nhớ của bot (LRU)
+LEADERBOARD_CACHE_SIZE = 10  # Số người chơi top đầu giữ trong bộ nhớ (0 = tắt cache)
+# Cầu tự định nghĩa (tên hiển thị -> mẫu), xem patterns.parse_pattern:
+# "2-2-2-2" = độ dài các lượt liên tiếp, "AABBAABB" = chuỗi kết quả (A/B là hai kết quả khác nhau)
+CUSTOM_PATTERNS = {
+    "Cầu 2-2": "2-2-2-2",
+    "Cầu 1-3": "1-3-1-3",
+}
 
 # Game constants
 TAI_MIN = 11  # Minimum value for "Tài" (High)
@@ -18,3 +38,24 @@ NUM_DICE = 3  # Number of dice to roll
 
 # Database
 DATABASE_PATH = "tai_xiu.db"
+
+# Journal các phiên đang chạy (khôi phục phiên khi bot khởi động lại)
+JOURNAL_PATH = "tai_xiu_rounds.journal"
+JOURNAL_FSYNC = False  # True = fsync sau mỗi bản ghi (chống cả mất điện, chậm hơn)
+JOURNAL_COMPACT_BYTES = 1024 * 1024  # Thu gọn journal khi vượt quá 1MB
+
+# SQLite tuning (áp dụng cho mọi kết nối)
+DB_SYNCHRONOUS = "NORMAL"  # OFF, NORMAL, FULL hoặc EXTRA - NORMAL là đủ an toàn với WAL
+DB_CACHE_SIZE = -16000  # Số âm = KiB, khoảng 16MB page cache cho mỗi kết nối
+DB_MMAP_SIZE = 256 * 1024 * 1024  # 256MB memory-mapped I/O
+DB_BUSY_TIMEOUT = 5000  # Thời gian chờ khi database bị khóa (ms)
+DB_READ_POOL_SIZE = 4  # Số kết nối chỉ đọc tối đa (dùng cho web)
+DB_EXECUTOR_WORKERS = 4  # Số thread chạy truy vấn database cho bot (asyncio)
+DB_GROUP_COMMIT_WINDOW = 0  # Thời gian chờ thêm thao tác ghi (giây); 0 = chỉ gom những thao tác đang xếp hàng
+DB_GROUP_COMMIT_MAX_BATCH = 500  # Số thao tác ghi tối đa trong một commit
+
+# Lưu trữ lịch sử cũ (archive)
+ARCHIVE_DATABASE_PATH = "tai_xiu_archive.db"
+ARCHIVE_MAX_AGE_DAYS = 30  # Chuyển các ván cũ hơn 30 ngày sang archive
+ARCHIVE_KEEP_GAMES = 100000  # Luôn chỉ giữ tối đa 100k ván gần nhất trong database chính
+ARCHIVE_BATCH_SIZE = 5000  # Số ván chuyển trong mỗi lượt
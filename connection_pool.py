@@ -0,0 +1,124 @@
+import sqlite3
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from config import (
+    DB_SYNCHRONOUS, DB_CACHE_SIZE, DB_MMAP_SIZE, DB_BUSY_TIMEOUT, DB_READ_POOL_SIZE
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+class ConnectionPool:
+    """
+    Manage the SQLite connections of one database file.
+
+    - One writer connection (WAL mode), shared between threads behind a lock.
+    - A bounded pool of read-only connections, so readers (e.g. the Flask
+      routes) never block the writer's commits and vice versa.
+    """
+
+    def __init__(self, path, read_pool_size=DB_READ_POOL_SIZE):
+        if DB_SYNCHRONOUS not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid DB_SYNCHRONOUS value: {DB_SYNCHRONOUS}")
+
+        self.path = path
+        self.read_pool_size = read_pool_size
+        self._closed = False
+
+        # Writer connection - tạo trước để file database và chế độ WAL tồn tại
+        self._write_lock = threading.RLock()
+        self._writer = self._connect(read_only=False)
+
+        # Read-only connections được tạo khi cần, tối đa read_pool_size
+        self._readers = queue.LifoQueue(maxsize=read_pool_size)
+        self._reader_count = 0
+        self._readers_lock = threading.Lock()
+
+    def _connect(self, read_only):
+        """Open a connection and apply the configured pragmas."""
+        if read_only:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            journal_mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            if journal_mode.lower() != "wal":
+                logger.warning(f"Could not enable WAL mode for {self.path} (got {journal_mode})")
+
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = {int(DB_CACHE_SIZE)}")
+        conn.execute(f"PRAGMA mmap_size = {int(DB_MMAP_SIZE)}")
+        conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT)}")
+
+        logger.debug(f"Opened {'read-only' if read_only else 'writer'} connection to {self.path}")
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Borrow the writer connection (serialized between threads)."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        with self._write_lock:
+            yield self._writer
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection from the pool."""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    def _acquire_reader(self):
+        """Take an idle reader, open a new one, or wait for one to be returned."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if self._reader_count < self.read_pool_size:
+                self._reader_count += 1
+                return self._connect(read_only=True)
+
+        try:
+            return self._readers.get(timeout=DB_BUSY_TIMEOUT / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a read connection")
+
+    def _release_reader(self, conn):
+        """Return a reader to the pool, or close it if the pool was closed meanwhile."""
+        if self._closed:
+            conn.close()
+            return
+        self._readers.put_nowait(conn)
+
+    def close(self):
+        """Close the writer and every reader connection."""
+        if self._closed:
+            return
+        self._closed = True
+
+        # Đóng các reader đang rảnh, reader đang được dùng sẽ bị đóng khi trả lại
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+        with self._write_lock:
+            self._writer.close()
+
+        logger.info(f"Closed all connections to {self.path}")
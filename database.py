@@ -1,211 +1,582 @@
-import sqlite3
-import json
+import os
 import logging
-import threading
-from datetime import datetime
-from config import DATABASE_PATH, DEFAULT_BALANCE, RESET_BALANCE, HISTORY_SIZE
+from config import (
+    DATABASE_PATH, ARCHIVE_DATABASE_PATH, DEFAULT_BALANCE, RESET_BALANCE, HISTORY_SIZE,
+    LEADERBOARD_SIZE, LEADERBOARD_CACHE_SIZE, DICE_MIN, DICE_MAX, RESULT_SCAN_BATCH_SIZE
+)
+from archive import HistoryArchive
+from connection_pool import ConnectionPool
+from db_writer import DatabaseWriter
+from history_queries import (
+    query_game_history, query_player_bet_history, query_game_results, merge_pages, clamp_page_size
+)
+from migrations import run_migrations, rebuild_stats
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Tạo local thread storage để lưu kết nối SQLite
-local_storage = threading.local()
+INSERT_GAME_SQL = """INSERT INTO game_history (seed, md5_hash, dice1, dice2, dice3, total_value, result, round_id)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Cập nhật thống kê trọn đời của người chơi khi lưu một cược
+UPDATE_PLAYER_STATS_SQL = """UPDATE players
+                             SET win_count = win_count + ?,
+                                 loss_count = loss_count + ?,
+                                 total_won = total_won + ?,
+                                 total_lost = total_lost + ?
+                             WHERE user_id = ?"""
+
+# Số dòng tối đa trong mỗi câu lệnh nhiều tham số để tránh vượt giới hạn của SQLite
+SQL_IN_CHUNK_SIZE = 500
+
+def _bet_outcome(win_amount):
+    """Return the bet_history result of a bet: "win" or "loss"."""
+    return "win" if win_amount > 0 else "loss"
+
+def _bet_stats_delta(result, win_amount):
+    """Return the (win_count, loss_count, total_won, total_lost) increments of a bet."""
+    if result == "win":
+        return 1, 0, win_amount, 0
+    return 0, 1, 0, abs(win_amount)
 
 class Database:
-    def __init__(self):
-        """Initialize the database and create tables if they don't exist."""
-        self.create_tables()
-    
-    def get_connection(self):
-        """Get a connection to the database - thread-safe version."""
-        # Tạo kết nối mới cho mỗi thread nếu chưa có
-        if not hasattr(local_storage, 'conn'):
-            local_storage.conn = sqlite3.connect(DATABASE_PATH)
-            local_storage.conn.row_factory = sqlite3.Row
-            logger.debug(f"Created new connection for thread {threading.get_ident()}")
-        return local_storage.conn
-    
-    def create_tables(self):
-        """Create the necessary tables if they don't exist."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Players table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS players (
-            user_id TEXT PRIMARY KEY,
-            username TEXT NOT NULL,
-            balance INTEGER DEFAULT 1000000,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Game history table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS game_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            seed TEXT NOT NULL,
-            md5_hash TEXT NOT NULL,
-            dice_values TEXT NOT NULL,
-            total_value INTEGER NOT NULL,
-            result TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Bet history table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bet_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT NOT NULL,
-            game_id INTEGER NOT NULL,
-            bet_amount INTEGER NOT NULL,
-            bet_type TEXT NOT NULL,
-            result TEXT NOT NULL,
-            win_amount INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES players (user_id),
-            FOREIGN KEY (game_id) REFERENCES game_history (id)
-        )
-        ''')
-        
-        conn.commit()
-        logger.info("Database tables created successfully")
+    def __init__(self, path=DATABASE_PATH, archive_path=ARCHIVE_DATABASE_PATH):
+        """Initialize the database and apply pending schema migrations."""
+        self.path = path
+        self.archive_path = archive_path
+        self._archive = None
+        # Top LEADERBOARD_CACHE_SIZE người chơi, làm mới sau mỗi ván (None = chưa có)
+        self._leaderboard_cache = None
+        self.pool = ConnectionPool(path)
+        self.migrate()
+        # Mọi thao tác ghi đi qua một writer thread duy nhất (group commit)
+        self.write_queue = DatabaseWriter(self.pool)
+    
+    def writer(self):
+        """Borrow the writer connection (use as a context manager)."""
+        return self.pool.writer()
+    
+    def reader(self):
+        """Borrow a read-only connection (use as a context manager)."""
+        return self.pool.reader()
+    
+    def migrate(self):
+        """Bring the schema up to date by applying pending migrations."""
+        with self.writer() as conn:
+            version = run_migrations(conn)
+            logger.info(f"Database schema is at version {version}")
+    
+    def submit(self, operation, *args):
+        """
+        Queue a write operation (e.g. "save_bet") on the single writer thread.
+        Returns a concurrent.futures.Future resolved once its group has committed.
+        """
+        return self.write_queue.submit(getattr(self, f"_{operation}_tx"), *args)
     
     def get_or_create_player(self, user_id, username):
         """Get a player or create if not exists."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM players WHERE user_id = ?", (user_id,))
-        player = cursor.fetchone()
-        
-        if player is None:
-            cursor.execute(
-                "INSERT INTO players (user_id, username, balance) VALUES (?, ?, ?)",
-                (user_id, username, DEFAULT_BALANCE)
-            )
-            conn.commit()
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
             cursor.execute("SELECT * FROM players WHERE user_id = ?", (user_id,))
             player = cursor.fetchone()
-            logger.info(f"Created new player: {username} with ID {user_id}")
         
-        return dict(player)
+        if player is not None:
+            return dict(player)
+        
+        player = self.submit("create_player", user_id, username).result()
+        # Người chơi mới có thể lọt vào top-N, hoặc cache ngắn đang được coi là toàn bộ người chơi
+        cached = self._leaderboard_cache
+        if cached is not None and (len(cached) < LEADERBOARD_CACHE_SIZE
+                                   or player['balance'] >= cached[-1]['balance']):
+            self.refresh_leaderboard_cache()
+        return player
+    
+    def _create_player_tx(self, cursor, user_id, username):
+        # Một câu lệnh UPSERT: tạo mới, hoặc trả về người chơi vừa được tạo bởi luồng khác
+        cursor.execute(
+            """INSERT INTO players (user_id, username, balance) VALUES (?, ?, ?)
+               ON CONFLICT (user_id) DO UPDATE SET username = excluded.username
+               RETURNING *""",
+            (user_id, username, DEFAULT_BALANCE)
+        )
+        player = dict(cursor.fetchone())
+        logger.info(f"Created new player: {username} with ID {user_id}")
+        return player
     
     def update_player_balance(self, user_id, amount_change):
-        """Update a player's balance."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT balance FROM players WHERE user_id = ?", (user_id,))
+        """Update a player's balance (reset to RESET_BALANCE if it drops to 0 or below)."""
+        return self.submit("update_player_balance", user_id, amount_change).result()
+    
+    def _update_player_balance_tx(self, cursor, user_id, amount_change):
+        cursor.execute(
+            """UPDATE players
+               SET balance = CASE WHEN balance + ? <= 0 THEN ? ELSE balance + ? END,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE user_id = ?
+               RETURNING balance""",
+            (amount_change, RESET_BALANCE, amount_change, user_id)
+        )
         player = cursor.fetchone()
         
         if player is None:
             return False
         
-        new_balance = player['balance'] + amount_change
-        
-        # If player runs out of money, reset to RESET_BALANCE
-        if new_balance <= 0:
-            new_balance = RESET_BALANCE
-            logger.info(f"Resetting balance for user {user_id} to {RESET_BALANCE}")
-        
+        return player['balance']
+    
+    def reserve_funds(self, user_id, amount):
+        """
+        Hold `amount` of a player's balance for an unsettled bet (negative
+        amounts release it). Returns the new reserved total, or None if the
+        player does not have enough unreserved balance.
+        """
+        return self.submit("reserve_funds", user_id, amount).result()
+    
+    def _reserve_funds_tx(self, cursor, user_id, amount):
         cursor.execute(
-            "UPDATE players SET balance = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?",
-            (new_balance, user_id)
+            """UPDATE players
+               SET reserved = MAX(reserved + ?, 0)
+               WHERE user_id = ? AND balance - reserved >= ?
+               RETURNING reserved""",
+            (amount, user_id, amount)
         )
-        conn.commit()
+        player = cursor.fetchone()
+        
+        if player is None:
+            return None
         
-        return new_balance
+        return player['reserved']
+    
+    def restore_reservations(self, reserved_by_user=None):
+        """
+        Reset every reservation to the stakes of the rounds still open (on
+        startup): `reserved_by_user` maps user_id to the amount to keep held.
+        """
+        reserved_by_user = reserved_by_user or {}
+        reset = self.submit("restore_reservations", reserved_by_user).result()
+        if reset or reserved_by_user:
+            logger.info(f"Reset reservations of {reset} players, "
+                        f"kept {len(reserved_by_user)} for recovered rounds")
+        return reset
+    
+    def _restore_reservations_tx(self, cursor, reserved_by_user):
+        cursor.execute("UPDATE players SET reserved = 0 WHERE reserved != 0")
+        reset = cursor.rowcount
+        cursor.executemany(
+            "UPDATE players SET reserved = ? WHERE user_id = ?",
+            [(amount, user_id) for user_id, amount in reserved_by_user.items()]
+        )
+        return reset
     
     def get_player_balance(self, user_id):
         """Get a player's current balance."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT balance FROM players WHERE user_id = ?", (user_id,))
+            player = cursor.fetchone()
+            
+            if player is None:
+                return None
+            
+            return player['balance']
+    
+    def _insert_game(self, cursor, seed, md5_hash, dice_values, total_value, result, round_id=None):
+        """Insert a game row and update the statistics rollups (inside the caller's transaction)."""
+        cursor.execute(
+            INSERT_GAME_SQL,
+            (seed, md5_hash, *dice_values, total_value, result, round_id)
+        )
+        game_id = cursor.lastrowid
         
-        cursor.execute("SELECT balance FROM players WHERE user_id = ?", (user_id,))
-        player = cursor.fetchone()
+        cursor.execute(
+            """INSERT INTO stats_result (result, count) VALUES (?, 1)
+               ON CONFLICT (result) DO UPDATE SET count = count + 1""",
+            (result,)
+        )
+        cursor.executemany(
+            """INSERT INTO stats_dice_face (face, count) VALUES (?, 1)
+               ON CONFLICT (face) DO UPDATE SET count = count + 1""",
+            [(face,) for face in dice_values]
+        )
+        cursor.execute(
+            """INSERT INTO stats_total (total_value, count) VALUES (?, 1)
+               ON CONFLICT (total_value) DO UPDATE SET count = count + 1""",
+            (total_value,)
+        )
+        
+        return game_id
+    
+    def get_player_stats(self, user_id):
+        """
+        Get a player together with their lifetime betting statistics.
+        Returns None if the player does not exist.
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT * FROM players WHERE user_id = ?", (user_id,))
+            player = cursor.fetchone()
         
         if player is None:
             return None
         
-        return player['balance']
+        player = dict(player)
+        total_bets = player['win_count'] + player['loss_count']
+        player['total_bets'] = total_bets
+        player['win_rate'] = (player['win_count'] / total_bets * 100) if total_bets > 0 else 0
+        player['net_profit'] = player['total_won'] - player['total_lost']
+        
+        return player
     
-    def save_game_result(self, seed, md5_hash, dice_values, total_value, result):
-        """Save a game result to the database."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_leaderboard(self, limit=LEADERBOARD_SIZE, after_balance=None, after_user_id=None):
+        """
+        Get a page of players ordered by balance, richest first.
         
-        dice_json = json.dumps(dice_values)
+        Keyset pagination on (balance, user_id): pass the balance and user_id of
+        the last player of the previous page to get the next one. The first page
+        is served from the in-memory top-N cache when it is big enough.
+        """
+        limit = clamp_page_size(limit)
         
-        cursor.execute(
-            "INSERT INTO game_history (seed, md5_hash, dice_values, total_value, result) VALUES (?, ?, ?, ?, ?)",
-            (seed, md5_hash, dice_json, total_value, result)
-        )
+        cached = self._leaderboard_cache
+        if after_balance is None and cached is not None:
+            # Cache đủ dài, hoặc chứa toàn bộ người chơi
+            if limit <= len(cached) or len(cached) < LEADERBOARD_CACHE_SIZE:
+                return [dict(player) for player in cached[:limit]]
         
-        conn.commit()
-        return cursor.lastrowid
+        return self._query_leaderboard(limit, after_balance, after_user_id)
+    
+    def _query_leaderboard(self, limit, after_balance=None, after_user_id=None):
+        """Read a leaderboard page with a backwards scan of idx_players_balance."""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            if after_balance is None:
+                cursor.execute(
+                    """SELECT user_id, username, balance FROM players
+                       ORDER BY balance DESC, user_id DESC LIMIT ?""",
+                    (limit,)
+                )
+            else:
+                cursor.execute(
+                    """SELECT user_id, username, balance FROM players
+                       WHERE (balance, user_id) < (?, ?)
+                       ORDER BY balance DESC, user_id DESC LIMIT ?""",
+                    (after_balance, after_user_id or "", limit)
+                )
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def refresh_leaderboard_cache(self):
+        """
+        Reload the top-N cache (called after each settlement). Never raises: a
+        failed reload is logged and drops the cache, so the leaderboard is read
+        from SQLite until the next refresh.
+        """
+        if LEADERBOARD_CACHE_SIZE <= 0:
+            return
+        try:
+            self._leaderboard_cache = self._query_leaderboard(LEADERBOARD_CACHE_SIZE)
+        except Exception as e:
+            self._leaderboard_cache = None
+            logger.error(f"Error refreshing leaderboard cache: {e}")
+    
+    def get_player_rank(self, user_id):
+        """
+        Get a player's leaderboard position as {"rank", "balance"}, or None.
+        Only the players above them are counted, using the balance index.
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT balance FROM players WHERE user_id = ?", (user_id,))
+            player = cursor.fetchone()
+            if player is None:
+                return None
+            
+            cursor.execute("SELECT COUNT(*) FROM players WHERE balance > ?", (player['balance'],))
+            return {"rank": cursor.fetchone()[0] + 1, "balance": player['balance']}
+    
+    def save_game_result(self, seed, md5_hash, dice_values, total_value, result):
+        """Save a game result to the database."""
+        return self.submit("save_game_result", seed, md5_hash, dice_values, total_value, result).result()
+    
+    def _save_game_result_tx(self, cursor, seed, md5_hash, dice_values, total_value, result):
+        return self._insert_game(cursor, seed, md5_hash, dice_values, total_value, result)
     
     def save_bet(self, user_id, game_id, bet_amount, bet_type, result, win_amount):
         """Save a bet to the database."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        return self.submit("save_bet", user_id, game_id, bet_amount, bet_type, result, win_amount).result()
+    
+    def _save_bet_tx(self, cursor, user_id, game_id, bet_amount, bet_type, result, win_amount):
         cursor.execute(
             """INSERT INTO bet_history 
                (user_id, game_id, bet_amount, bet_type, result, win_amount) 
                VALUES (?, ?, ?, ?, ?, ?)""",
             (user_id, game_id, bet_amount, bet_type, result, win_amount)
         )
+        bet_id = cursor.lastrowid
         
-        conn.commit()
-        return cursor.lastrowid
+        cursor.execute(
+            UPDATE_PLAYER_STATS_SQL,
+            (*_bet_stats_delta(result, win_amount), user_id)
+        )
+        
+        return bet_id
     
-    def get_game_history(self, limit=HISTORY_SIZE):
-        """Get recent game history."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def settle_game(self, seed, md5_hash, dice_values, total_value, result, bets, round_id=None):
+        """
+        Save a game result and settle all of its bets in a single transaction.
         
-        cursor.execute(
-            "SELECT * FROM game_history ORDER BY created_at DESC LIMIT ?",
-            (limit,)
+        `bets` is a list of (user_id, bet_amount, bet_type, win_amount) tuples.
+        Returns (game_id, new_balances, reserved) where new_balances and reserved
+        map user_id to the player's balance and remaining reservation after the
+        game, or None if a game for `round_id` was already settled.
+        """
+        settled = self.submit("settle_game", seed, md5_hash, dice_values, total_value, result, bets,
+                              round_id).result()
+        self.refresh_leaderboard_cache()
+        return settled
+    
+    def _settle_game_tx(self, cursor, seed, md5_hash, dice_values, total_value, result, bets, round_id=None):
+        if round_id is not None:
+            cursor.execute("SELECT 1 FROM game_history WHERE round_id = ?", (round_id,))
+            if cursor.fetchone() is not None:
+                logger.warning(f"Round {round_id} was already settled, skipping")
+                return None
+        
+        game_id = self._insert_game(cursor, seed, md5_hash, dice_values, total_value, result, round_id)
+        
+        cursor.executemany(
+            """INSERT INTO bet_history 
+               (user_id, game_id, bet_amount, bet_type, result, win_amount) 
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            [(user_id, game_id, bet_amount, bet_type, _bet_outcome(win_amount), win_amount)
+             for user_id, bet_amount, bet_type, win_amount in bets]
         )
         
-        history = [dict(row) for row in cursor.fetchall()]
+        # Cập nhật số dư (hết tiền thì reset về RESET_BALANCE), giải phóng tiền giữ
+        # và thống kê trọn đời; RETURNING trả về số dư và tiền giữ mới nên không cần đọc lại
+        new_balances = {}
+        reserved = {}
+        for i in range(0, len(bets), SQL_IN_CHUNK_SIZE):
+            chunk = bets[i:i + SQL_IN_CHUNK_SIZE]
+            values = ", ".join("(?, ?, ?, ?, ?, ?, ?)" for _ in chunk)
+            params = []
+            for user_id, bet_amount, _, win_amount in chunk:
+                params.extend((user_id, bet_amount, win_amount,
+                               *_bet_stats_delta(_bet_outcome(win_amount), win_amount)))
+            
+            cursor.execute(
+                f"""WITH s (user_id, bet_amount, win_amount, win_count, loss_count, total_won, total_lost)
+                    AS (VALUES {values})
+                    UPDATE players
+                    SET balance = CASE WHEN players.balance + s.win_amount <= 0 THEN ?
+                                       ELSE players.balance + s.win_amount END,
+                        reserved = MAX(players.reserved - s.bet_amount, 0),
+                        win_count = players.win_count + s.win_count,
+                        loss_count = players.loss_count + s.loss_count,
+                        total_won = players.total_won + s.total_won,
+                        total_lost = players.total_lost + s.total_lost,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM s
+                    WHERE players.user_id = s.user_id
+                    RETURNING players.user_id, players.balance, players.reserved""",
+                (*params, RESET_BALANCE)
+            )
+            for row in cursor.fetchall():
+                new_balances[row['user_id']] = row['balance']
+                reserved[row['user_id']] = row['reserved']
+        
+        return game_id, new_balances, reserved
+    
+    @property
+    def archive(self):
+        """The history archive, opened on first use (None if it was never created)."""
+        if self._archive is None and self.archive_path and os.path.exists(self.archive_path):
+            self._archive = HistoryArchive(self.archive_path)
+        return self._archive
+    
+    def get_game_history(self, limit=HISTORY_SIZE, before_id=None, after_id=None, include_archive=False):
+        """
+        Get a page of game history, newest first.
+        
+        Pagination is keyset-based: pass the smallest id of the previous page as
+        `before_id` to get older games, or the largest id seen as `after_id` to
+        get newer ones. Every page costs the same as the first one.
+        Archived games are only searched when `include_archive` is set.
+        """
+        with self.reader() as conn:
+            history = query_game_history(conn, limit, before_id, after_id)
         
-        # Convert dice_values from JSON string to list
-        for game in history:
-            game['dice_values'] = json.loads(game['dice_values'])
+        if include_archive and self.archive and self._needs_archive(history, limit, after_id):
+            archived = self.archive.get_game_history(limit, before_id, after_id)
+            history = merge_pages(history, archived, limit, before_id, after_id)
         
         return history
     
-    def get_player_bet_history(self, user_id, limit=HISTORY_SIZE):
-        """Get a player's betting history."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_player_bet_history(self, user_id, limit=HISTORY_SIZE, before_id=None, after_id=None,
+                               include_archive=False):
+        """Get a page of a player's betting history, newest first (same cursors as get_game_history)."""
+        with self.reader() as conn:
+            history = query_player_bet_history(conn, user_id, limit, before_id, after_id)
         
+        if include_archive and self.archive and self._needs_archive(history, limit, after_id):
+            archived = self.archive.get_player_bet_history(user_id, limit, before_id, after_id)
+            history = merge_pages(history, archived, limit, before_id, after_id)
+        
+        return history
+    
+    def iter_game_results(self, after_id=0, batch_size=RESULT_SCAN_BATCH_SIZE, columns="id, result"):
+        """
+        Yield (game_id, result) - or the given `columns`, id first - for every
+        game after `after_id`, oldest first, archived games included.
+        """
+        for batch in self.iter_game_batches(after_id, batch_size, columns):
+            yield from batch
+    
+    def iter_game_batches(self, after_id=0, batch_size=RESULT_SCAN_BATCH_SIZE, columns="id, result"):
+        """
+        Same rows as iter_game_results, as lists of up to `batch_size`. Reads in
+        keyset batches, so no connection is held between batches; a game
+        present in both databases is yielded once.
+        """
+        sources = [self.archive.get_game_results] if self.archive else []
+        sources.append(self._get_game_results)
+        for read_batch in sources:
+            while True:
+                batch = read_batch(after_id, batch_size, columns)
+                if not batch:
+                    break
+                yield batch
+                after_id = batch[-1][0]
+    
+    def _get_game_results(self, after_id, limit, columns):
+        with self.reader() as conn:
+            return query_game_results(conn, after_id, limit, columns)
+    
+    def _needs_archive(self, hot_page, limit, after_id):
+        """Archived rows are older than hot ones: only look there if they could be on this page."""
+        return after_id is not None or len(hot_page) < clamp_page_size(limit)
+    
+    def get_archive_cutoff(self, max_age_days, keep_games):
+        """Return the id of the newest game that should be archived (None if nothing)."""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                """SELECT id FROM game_history
+                   WHERE created_at < datetime('now', ?)
+                   ORDER BY id DESC LIMIT 1""",
+                (f"-{int(max_age_days)} days",)
+            )
+            by_age = cursor.fetchone()
+            
+            cursor.execute(
+                "SELECT id FROM game_history ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (keep_games,)
+            )
+            by_count = cursor.fetchone()
+        
+        candidates = [row['id'] for row in (by_age, by_count) if row is not None]
+        return max(candidates) if candidates else None
+    
+    def read_history_batch(self, cutoff_id, batch_size):
+        """Read the oldest games with id <= cutoff_id and all of their bets, as raw rows."""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT * FROM game_history WHERE id <= ? ORDER BY id LIMIT ?",
+                (cutoff_id, batch_size)
+            )
+            games = [dict(row) for row in cursor.fetchall()]
+            if not games:
+                return [], []
+            
+            cursor.execute(
+                "SELECT * FROM bet_history WHERE game_id BETWEEN ? AND ?",
+                (games[0]['id'], games[-1]['id'])
+            )
+            bets = [dict(row) for row in cursor.fetchall()]
+        
+        return games, bets
+    
+    def delete_history_range(self, first_game_id, last_game_id):
+        """Delete a range of games and their bets from the hot database (after archiving)."""
+        return self.submit("delete_history_range", first_game_id, last_game_id).result()
+    
+    def _delete_history_range_tx(self, cursor, first_game_id, last_game_id):
         cursor.execute(
-            """SELECT bh.*, gh.dice_values, gh.total_value, gh.result as game_result 
-               FROM bet_history bh
-               JOIN game_history gh ON bh.game_id = gh.id
-               WHERE bh.user_id = ?
-               ORDER BY bh.created_at DESC LIMIT ?""",
-            (user_id, limit)
+            "DELETE FROM bet_history WHERE game_id BETWEEN ? AND ?",
+            (first_game_id, last_game_id)
         )
+        cursor.execute(
+            "DELETE FROM game_history WHERE id BETWEEN ? AND ?",
+            (first_game_id, last_game_id)
+        )
+        return cursor.rowcount
+    
+    def vacuum(self):
+        """Rebuild the hot database file so space freed by archival is returned."""
+        with self.writer() as conn:
+            conn.execute("VACUUM")
+    
+    def get_stats(self):
+        """Get the overall game statistics from the rollup tables."""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT result, count FROM stats_result")
+            result_distribution = {row['result']: row['count'] for row in cursor.fetchall()}
+            
+            cursor.execute("SELECT face, count FROM stats_dice_face")
+            dice_distribution = {face: 0 for face in range(DICE_MIN, DICE_MAX + 1)}
+            for row in cursor.fetchall():
+                dice_distribution[row['face']] = row['count']
+            
+            cursor.execute("SELECT total_value, count FROM stats_total ORDER BY total_value")
+            total_distribution = {row['total_value']: row['count'] for row in cursor.fetchall()}
         
-        history = [dict(row) for row in cursor.fetchall()]
-        
-        # Convert dice_values from JSON string to list
-        for bet in history:
-            bet['dice_values'] = json.loads(bet['dice_values'])
+        return {
+            "total_games": sum(result_distribution.values()),
+            "result_distribution": result_distribution,
+            "dice_distribution": dice_distribution,
+            "total_distribution": total_distribution
+        }
+    
+    def rebuild_stats(self):
+        """Recompute the statistics rollups from the full game history (hot and archived)."""
+        archived_counts = self.archive.get_stats_counts() if self.archive else None
+        self.submit("rebuild_stats", archived_counts).result()
+        logger.info("Rebuilt statistics rollup tables")
+    
+    def _rebuild_stats_tx(self, cursor, archived_counts):
+        rebuild_stats(cursor)
         
-        return history
+        if archived_counts:
+            results, faces, totals = archived_counts
+            cursor.executemany(
+                """INSERT INTO stats_result (result, count) VALUES (?, ?)
+                   ON CONFLICT (result) DO UPDATE SET count = count + excluded.count""",
+                results
+            )
+            cursor.executemany(
+                """INSERT INTO stats_dice_face (face, count) VALUES (?, ?)
+                   ON CONFLICT (face) DO UPDATE SET count = count + excluded.count""",
+                faces
+            )
+            cursor.executemany(
+                """INSERT INTO stats_total (total_value, count) VALUES (?, ?)
+                   ON CONFLICT (total_value) DO UPDATE SET count = count + excluded.count""",
+                totals
+            )
     
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Flush pending writes and close all database connections."""
+        self.write_queue.close()
+        self.pool.close()
+        if self._archive is not None:
+            self._archive.close()
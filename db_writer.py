@@ -0,0 +1,117 @@
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from config import DB_GROUP_COMMIT_WINDOW, DB_GROUP_COMMIT_MAX_BATCH
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Đánh dấu yêu cầu dừng writer thread
+_STOP = object()
+
+class DatabaseWriter:
+    """
+    Single writer thread with group commit.
+
+    Write operations are queued as fn(cursor, *args). The thread takes the
+    first waiting operation, collects everything else already queued (plus
+    whatever arrives within DB_GROUP_COMMIT_WINDOW seconds), runs them all
+    in one transaction - each inside its own SAVEPOINT, so one failing
+    operation does not undo the others - and commits once. Each caller's
+    Future resolves after the commit that contains its operation.
+    """
+
+    def __init__(self, pool, window=DB_GROUP_COMMIT_WINDOW, max_batch=DB_GROUP_COMMIT_MAX_BATCH):
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self.commits = 0
+        self.operations = 0
+
+        self._queue = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        """Queue fn(cursor, *args) for the writer thread and return a Future of its result."""
+        if self._stopped:
+            raise RuntimeError("Database writer is stopped")
+        future = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    def _run(self):
+        """Writer thread: collect a group of operations and commit it."""
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    timeout = deadline - time.monotonic()
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    running = False
+                    break
+                batch.append(item)
+
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        """Run a group of operations in one transaction and resolve their futures."""
+        outcomes = []
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    for fn, args, future in batch:
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        cursor.execute("SAVEPOINT write_op")
+                        try:
+                            result = fn(cursor, *args)
+                            cursor.execute("RELEASE write_op")
+                            outcomes.append((future, result, None))
+                        except Exception as e:
+                            cursor.execute("ROLLBACK TO write_op")
+                            cursor.execute("RELEASE write_op")
+                            outcomes.append((future, None, e))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} operations failed: {e}")
+            for fn, args, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.commits += 1
+        self.operations += len(outcomes)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        """Finish every queued operation, then stop the writer thread."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        logger.info(f"Database writer stopped after {self.operations} operations in {self.commits} commits")
@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from config import DISPATCH_WORKERS, DISPATCH_WARN_DEPTH
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Độ ưu tiên (số nhỏ hơn được gửi trước)
+PRIORITY_RESULT = 0
+PRIORITY_NEW_ROUND = 1
+PRIORITY_BET = 2
+PRIORITY_COUNTDOWN = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_RESULT: "result",
+    PRIORITY_NEW_ROUND: "new_round",
+    PRIORITY_BET: "bet",
+    PRIORITY_COUNTDOWN: "countdown",
+}
+
+class _Job:
+    __slots__ = ("priority", "message_id", "make_call", "future", "dropped")
+
+    def __init__(self, priority, message_id, make_call, future):
+        self.priority = priority
+        self.message_id = message_id
+        self.make_call = make_call
+        self.future = future
+        self.dropped = False
+
+
+class DiscordDispatcher:
+    """
+    Bot-wide outbound queue for Discord message operations.
+
+    Every send/edit the game makes goes through one priority queue drained by
+    DISPATCH_WORKERS tasks, so when the rate limits bite, results go out
+    before new-round messages, bet-driven refreshes and countdown ticks.
+    A queued edit of a message is dropped as soon as a newer edit of the same
+    message is queued (the newer one keeps the higher of the two priorities),
+    and operations on one message never run concurrently, so a slow countdown
+    edit can't land after the result.
+    """
+
+    def __init__(self, workers=DISPATCH_WORKERS):
+        self.workers = workers
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+
+        self._depth = 0  # Số thao tác còn chờ gửi (không tính lệnh đã bị thay thế)
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending_edits = {}  # {message_id: _Job} - các lệnh sửa chưa được gửi
+        self._in_flight = set()  # message_id đang được sửa
+        self._deferred = {}  # {message_id: _Job} - chờ lệnh đang chạy trên cùng tin nhắn
+        self._wakeup = None
+        self._tasks = []
+
+    def edit(self, message, embed, priority):
+        """Queue message.edit(embed=embed); returns a Future of the edited message (None if superseded)."""
+        superseded = self._pending_edits.get(message.id)
+        if superseded is not None:
+            superseded.dropped = True
+            if not superseded.future.done():
+                superseded.future.set_result(None)
+            self.dropped += 1
+            self._depth -= 1
+            priority = min(priority, superseded.priority)
+
+        job = self._push(priority, message.id, lambda: message.edit(embed=embed))
+        self._pending_edits[message.id] = job
+        return job.future
+
+    def send(self, channel, priority, **kwargs):
+        """Queue channel.send(**kwargs); returns a Future of the sent message."""
+        return self._push(priority, None, lambda: channel.send(**kwargs)).future
+
+    def _push(self, priority, message_id, make_call):
+        self._start()
+        job = _Job(priority, message_id, make_call, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._heap, (priority, next(self._seq), job))
+        self._wakeup.set()
+
+        self._depth += 1
+        if self._depth > self.max_depth:
+            self.max_depth = self._depth
+            if self._depth >= DISPATCH_WARN_DEPTH:
+                logger.warning(f"Discord dispatch queue depth reached {self._depth}: {self.metrics()['queued']}")
+        return job
+
+    def _start(self):
+        """Start the worker tasks on first use (needs a running event loop)."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, _, job = heapq.heappop(self._heap)
+            if job.dropped:
+                continue
+            if job.message_id is not None:
+                if job.message_id in self._in_flight:
+                    self._deferred[job.message_id] = job
+                    continue
+                if self._pending_edits.get(job.message_id) is job:
+                    del self._pending_edits[job.message_id]
+                self._in_flight.add(job.message_id)
+            self._depth -= 1
+
+            try:
+                result = await job.make_call()
+                self.sent += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                # Dispatcher bị đóng giữa chừng: người đang chờ lệnh này không bị treo
+                job.future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                if job.message_id is not None:
+                    self._release(job.message_id)
+
+    def _release(self, message_id):
+        """A message's operation finished: requeue the edit that was waiting for it."""
+        self._in_flight.discard(message_id)
+        waiting = self._deferred.pop(message_id, None)
+        if waiting is not None and not waiting.dropped:
+            heapq.heappush(self._heap, (waiting.priority, next(self._seq), waiting))
+            self._wakeup.set()
+
+    def depth(self):
+        """Number of queued operations that will still be sent."""
+        return self._depth
+
+    def metrics(self):
+        """Queue depth per priority plus lifetime counters."""
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        jobs = [job for _, _, job in self._heap]
+        jobs.extend(self._deferred.values())
+        for job in jobs:
+            if not job.dropped:
+                queued[PRIORITY_NAMES[job.priority]] += 1
+        return {
+            "depth": self._depth,
+            "queued": queued,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def close(self):
+        """Stop the workers and cancel every queued operation (their futures are cancelled)."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+        jobs = [job for _, _, job in self._heap]
+        jobs.extend(self._deferred.values())
+        for job in jobs:
+            if not job.future.done():
+                job.future.cancel()
+        self._heap.clear()
+        self._deferred.clear()
+        self._pending_edits.clear()
+        self._in_flight.clear()
+        self._depth = 0
@@ -1,9 +1,10 @@
 import asyncio
+import contextlib
 import discord
-import random
-import time
+import heapq
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from discord import app_commands, Embed, Color
 
 from config import (
@@ -11,136 +12,211 @@ from config import (
     TAI_MIN, XI_MAX, RESET_BALANCE, HISTORY_SIZE
 )
 from database import Database
+from async_database import AsyncDatabase
 from utils import (
     generate_seed, generate_md5_hash, extract_dice_values, 
-    determine_result, format_currency, is_valid_bet_amount, 
-    calculate_winnings
+    determine_result, format_currency, calculate_winnings
 )
 from patterns import PatternAnalyzer
+from pattern_index import PatternIndex
+from dispatch import DiscordDispatcher, PRIORITY_RESULT, PRIORITY_NEW_ROUND, PRIORITY_BET
+from player_cache import PlayerCache
+from renderer import SessionRenderer
+from journal import RoundJournal, wall_deadline, snapshot_sessions
+from scheduler import RoundScheduler
+from sessions import SessionRegistry, Bet
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Số giây còn lại tại các mốc cập nhật embed: mỗi 5 giây, và từng giây trong 10 giây cuối
+COUNTDOWN_TICKS = sorted(set(range(5, BETTING_WINDOW, 5)) | set(range(1, 11)), reverse=True)
+
+# Thêm cảnh báo khi gần hết thời gian
+TIME_WARNINGS = {
+    10: "⚠️ **Chỉ còn 10 giây để đặt cược!**",
+    5: "⚠️ **Chỉ còn 5 giây cuối! Nhanh lên!**"
+}
+
+NEXT_ROUND_DELAY = 5  # Đợi 5 giây sau khi kết thúc phiên rồi mới bắt đầu phiên mới
+
 class TaiXiuGame:
     def __init__(self, bot):
         self.bot = bot
-        self.db = Database()
-        self.active_sessions = {}
-        self.session_count = 0
+        self.db = AsyncDatabase(Database())
+        # Journal các phiên đang chạy: những phiên chưa kết thúc khi bot dừng sẽ được khôi phục
+        self.journal = RoundJournal()
+        self._recovered_rounds = self.journal.replay()
+        self.journal.compact(self._recovered_rounds)
+        # Chỉ giữ lại tiền cược của các phiên được khôi phục, trả lại phần còn lại
+        self.db.database.restore_reservations(self._recovered_reservations())
+        self.sessions = SessionRegistry()
+        # Số dư người chơi trong bộ nhớ, ghi xuyên (write-through) sau mỗi thay đổi trong database
+        self.players = PlayerCache()
+        # Khóa theo người chơi: các lệnh /dat_cuoc của cùng một người được xử lý lần lượt
+        self._bet_locks = {}  # {user_id: [asyncio.Lock, số lệnh đang giữ hoặc chờ khóa]}
+        # Hàng đợi ưu tiên chung cho mọi thao tác gửi/sửa tin nhắn của trò chơi
+        self.dispatcher = DiscordDispatcher()
+        # Một bộ hẹn giờ chung cho mọi mốc đếm ngược và hạn kết thúc phiên
+        self.scheduler = RoundScheduler()
         self.pattern_analyzer = PatternAnalyzer()
+        # Chỉ mục mọi chuỗi kết quả trong toàn bộ lịch sử (/tim_cau)
+        self.pattern_index = PatternIndex()
         
         # Load game history for pattern analysis
         self._load_history()
     
+    def _recovered_reservations(self):
+        """Total stake per player across the rounds recovered from the journal."""
+        reserved = {}
+        for round_info in self._recovered_rounds.values():
+            for record in round_info["bets"].values():
+                reserved[record["user"]] = reserved.get(record["user"], 0) + record["amount"]
+        return reserved
+    
+    async def recover_rounds(self):
+        """
+        Resume the rounds that were open when the bot stopped (call once the bot
+        is connected). A round whose deadline passed while the bot was down is
+        settled right away; its bets were already accepted and their stakes held.
+        """
+        recovered, self._recovered_rounds = self._recovered_rounds, {}
+        for session_id, round_info in recovered.items():
+            channel_id = round_info["channel"]
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                try:
+                    channel = await self.bot.fetch_channel(channel_id)
+                except Exception as e:
+                    logger.error(f"Cannot fetch channel {channel_id} of recovered session {session_id}: {e}")
+            
+            remaining = max(round_info["deadline"] - time.time(), 0)
+            session = self._open_session(channel_id, self.scheduler.now() + remaining, session_id)
+            if session is None:
+                # Kênh đã có phiên mới (không xảy ra khi khôi phục ngay lúc khởi động)
+                logger.warning(f"Channel {channel_id} is busy, cannot recover session {session_id}")
+                continue
+            for record in round_info["bets"].values():
+                session.set_bet(Bet(record["user"], record["username"], record["amount"],
+                                    record["type"], datetime.now()))
+            if channel is not None:
+                if round_info["message"] is not None:
+                    session.message = channel.get_partial_message(round_info["message"])
+                else:
+                    # Bot dừng trước khi kịp gửi tin nhắn của phiên: gửi lại
+                    try:
+                        session.message = await self.dispatcher.send(
+                            channel, PRIORITY_NEW_ROUND, embed=self._create_session_embed(session)
+                        )
+                        self.journal.record_message(session_id, session.message.id)
+                    except Exception as e:
+                        logger.error(f"Cannot send the message of recovered session {session_id}: {e}")
+            
+            self._schedule_round(session)
+            logger.info(f"Recovered session {session_id} in channel {channel_id} "
+                        f"with {len(session.bets)} bets ({remaining:.0f}s left)")
+    
+    def _journal_open(self, session):
+        """Journal a new round before any bet can be accepted (its message id follows later)."""
+        self.journal.record_open(session.id, session.channel_id, None,
+                                 wall_deadline(session.deadline, self.scheduler.clock))
+    
+    async def _abort_session(self, session):
+        """Drop a round that never got its message: close it and give back its stakes."""
+        self.sessions.close(session.id)
+        self.journal.record_abort(session.id)
+        await self._release_stakes(session)
+    
+    async def _release_stakes(self, session):
+        """Give back the stakes held for a round's bets (round aborted or settled earlier)."""
+        for bet in session.bets.values():
+            reserved = await self.db.reserve_funds(bet.user_id, -bet.amount)
+            if reserved is not None:
+                self.players.update(bet.user_id, reserved=reserved)
+    
     def _load_history(self):
         """Load game history for pattern analysis."""
-        history = self.db.get_game_history()
-        results = [game['result'] for game in history]
+        # Chạy đồng bộ khi khởi tạo, trước khi có phiên nào hoạt động
+        history = self.db.database.get_game_history()
+        # Database trả về ván mới nhất trước, PatternAnalyzer cần ván cũ nhất trước
+        results = [game['result'] for game in reversed(history)]
         self.pattern_analyzer.set_history(results)
         logger.info(f"Loaded {len(results)} game results for pattern analysis")
+        self.pattern_index.build(self.db.database.iter_game_results())
     
     async def start_session(self, interaction):
         """Start a new Tài Xỉu game session."""
-        # Create a unique session ID
-        self.session_count += 1
-        session_id = f"session_{self.session_count}_{int(time.time())}"
-        
-        # Create a new session
-        session = {
-            "id": session_id,
-            "channel_id": interaction.channel_id,
-            "start_time": datetime.now(),
-            "end_time": datetime.now() + timedelta(seconds=BETTING_WINDOW),
-            "bets": {},  # {user_id: {"amount": amount, "type": "Tài/Xỉu"}}
-            "result": None,
-            "dice_values": None,
-            "total": None,
-            "message": None
-        }
-        
-        # Store the session
-        self.active_sessions[session_id] = session
+        # Mỗi kênh chỉ có một phiên hoạt động
+        session = self._open_session(interaction.channel_id)
+        if session is None:
+            await interaction.response.send_message(
+                "Kênh này đang có một phiên tài xỉu. Hãy đặt cược với /dat_cuoc.",
+                ephemeral=True
+            )
+            return None
+        session_id = session.id
+        # Ghi journal trước khi gửi tin nhắn: cược đã có thể được chấp nhận trong lúc chờ Discord
+        self._journal_open(session)
         
         # Send initial message
-        embed = self._create_session_embed(session)
-        await interaction.response.send_message(embed=embed)
-        message = await interaction.original_response()
-        session["message"] = message
-        
-        # Schedule updates
-        self.bot.loop.create_task(self._update_session(session_id))
+        try:
+            embed = self._create_session_embed(session)
+            await interaction.response.send_message(embed=embed)
+            session.message = await interaction.original_response()
+            self.journal.record_message(session_id, session.message.id)
+        except Exception:
+            # Không gửi được tin nhắn thì hủy phiên và giải phóng kênh cho phiên sau
+            await self._abort_session(session)
+            raise
+        
+        # Schedule countdown updates and the end of the round
+        self._schedule_round(session)
         
         logger.info(f"Started session {session_id} in channel {interaction.channel_id}")
         
         return session_id
     
-    async def _update_session(self, session_id):
-        """Update a session message and end it when time runs out."""
-        session = self.active_sessions.get(session_id)
-        if not session:
+    def _open_session(self, channel_id, deadline=None, session_id=None):
+        """Register a new round in a channel with its embed renderer (None if the channel is busy)."""
+        if deadline is None:
+            deadline = self.scheduler.now() + BETTING_WINDOW
+        session = self.sessions.open(channel_id, deadline=deadline, session_id=session_id)
+        if session is not None:
+            session.renderer = SessionRenderer(session, self._create_session_embed, self.dispatcher)
+        return session
+    
+    def _schedule_round(self, session):
+        """Register the round's countdown ticks and its deadline with the scheduler."""
+        now = self.scheduler.now()
+        for seconds_left in COUNTDOWN_TICKS:
+            # Phiên khôi phục từ journal có thể đã qua một số mốc
+            if seconds_left < BETTING_WINDOW and session.deadline - seconds_left > now:
+                self.scheduler.call_at(session.deadline - seconds_left, self._countdown_tick,
+                                       session.id, seconds_left)
+        self.scheduler.call_at(session.deadline, self._end_session, session.id)
+    
+    async def _countdown_tick(self, session_id, seconds_left):
+        """Refresh a round's countdown embed at one of its scheduled milestones."""
+        session = self.sessions.get(session_id)
+        if session is None or session.result is not None:
             return
         
-        try:
-            # Cập nhật tin nhắn thường xuyên hơn để hiển thị thời gian chính xác
-            update_times = [
-                BETTING_WINDOW - 5, BETTING_WINDOW - 10, BETTING_WINDOW - 15, 
-                BETTING_WINDOW - 20, BETTING_WINDOW - 25, BETTING_WINDOW - 30, 
-                BETTING_WINDOW - 35
-            ]
-            
-            # Thêm cảnh báo khi gần hết thời gian
-            time_warnings = {
-                10: "⚠️ **Chỉ còn 10 giây để đặt cược!**",
-                5: "⚠️ **Chỉ còn 5 giây cuối! Nhanh lên!**"
-            }
-            
-            await asyncio.sleep(1)  # Đợi một chút để đảm bảo tin nhắn đã được gửi
-            
-            # Cập nhật thời gian còn lại
-            now = datetime.now()
-            session_time_left = int((session["end_time"] - now).total_seconds())
-            
-            while session_time_left > 0:
-                # Cập nhật tin nhắn thường xuyên hơn khi gần đến thời hạn
-                if session_time_left in time_warnings:
-                    session["warning_message"] = time_warnings[session_time_left]
-                
-                if session_time_left in update_times or session_time_left <= 10:
-                    embed = self._create_session_embed(session)
-                    await session["message"].edit(embed=embed)
-                
-                # Đợi 1 giây và cập nhật thời gian còn lại
-                await asyncio.sleep(1)
-                now = datetime.now()
-                new_time_left = int((session["end_time"] - now).total_seconds())
-                
-                # Nếu thời gian đã thay đổi, cập nhật giá trị
-                if new_time_left != session_time_left:
-                    session_time_left = new_time_left
-            
-            # Wait until the betting window ends
-            now = datetime.now()
-            session_time_left = (session["end_time"] - now).total_seconds()
-            
-            if session_time_left > 0:
-                await asyncio.sleep(session_time_left)
-            
-            # End the session
-            await self._end_session(session_id)
-            
-        except Exception as e:
-            logger.error(f"Error updating session {session_id}: {e}")
-            # Try to end the session anyway
-            await self._end_session(session_id)
+        # Các mốc cảnh báo được gửi ngay, còn lại gộp theo EMBED_MIN_EDIT_INTERVAL
+        if seconds_left in TIME_WARNINGS:
+            session.warning_message = TIME_WARNINGS[seconds_left]
+            await session.renderer.flush()
+        else:
+            session.renderer.mark_dirty()
     
     async def _end_session(self, session_id):
         """End a game session and determine results."""
-        session = self.active_sessions.get(session_id)
+        session = self.sessions.get(session_id)
         if not session:
             return
         
+        settled = None
         try:
             # Generate result
             seed = generate_seed()
@@ -149,40 +225,51 @@ class TaiXiuGame:
             result, total = determine_result(dice_values)
             
             # Update session
-            session["result"] = result
-            session["dice_values"] = dice_values
-            session["total"] = total
-            
-            # Save game result to database
-            game_id = self.db.save_game_result(seed, md5_hash, dice_values, total, result)
+            session.result = result
+            session.dice_values = dice_values
+            session.total = total
+            session.seed = seed
+            session.md5_hash = md5_hash
+            
+            # Tính tiền thắng/thua cho từng người chơi
+            settlements = []
+            for bet in session.bets.values():
+                winnings = calculate_winnings(bet.amount, bet.type, result)
+                settlements.append((bet.user_id, bet.amount, bet.type, winnings))
+            
+            # Save game result, balances and bets in a single transaction
+            # round_id = id phiên: một phiên khôi phục từ journal không bao giờ bị thanh toán hai lần
+            settled = await self.db.settle_game(
+                seed, md5_hash, dice_values, total, result, settlements, round_id=session_id
+            )
+            if settled is None:
+                # Đã thanh toán trước khi bot dừng (nhưng chưa kịp ghi journal):
+                # tiền giữ được khôi phục cho phiên này phải được trả lại
+                self.journal.record_settle(session_id)
+                await self._release_stakes(session)
+                session.renderer.close()
+                self.sessions.close(session_id)
+                self.scheduler.call_later(NEXT_ROUND_DELAY, self._restart_round, session.channel_id)
+                return
+            self.journal.record_settle(session_id)
+            game_id, new_balances, reserved = settled
+            # Giá trị tuyệt đối từ database (không tự trừ tiền cược trên bản trong bộ nhớ)
+            for user_id in new_balances:
+                self.players.update(user_id, balance=new_balances[user_id], reserved=reserved[user_id])
             
             # Process bets
             winners = []
             losers = []
             
-            for user_id, bet_info in session["bets"].items():
-                bet_amount = bet_info["amount"]
-                bet_type = bet_info["type"]
-                username = bet_info["username"]
-                
-                # Calculate winnings
-                winnings = calculate_winnings(bet_amount, bet_type, result)
-                
-                # Update user balance
-                new_balance = self.db.update_player_balance(user_id, winnings)
-                
-                # Save bet to database
-                win_or_loss = "win" if winnings > 0 else "loss"
-                self.db.save_bet(user_id, game_id, bet_amount, bet_type, win_or_loss, winnings)
-                
+            for user_id, bet_amount, bet_type, winnings in settlements:
                 # Add to winners or losers list
                 bet_result = {
                     "user_id": user_id,
-                    "username": username,
+                    "username": session.bets[user_id].username,
                     "bet_amount": bet_amount,
                     "bet_type": bet_type,
                     "winnings": winnings,
-                    "new_balance": new_balance
+                    "new_balance": new_balances.get(user_id)
                 }
                 
                 if winnings > 0:
@@ -192,86 +279,72 @@ class TaiXiuGame:
             
             # Update pattern analyzer
             self.pattern_analyzer.append_result(result)
+            self.pattern_index.append(result, game_id)
             
-            # Send results
+            # Send results (bỏ các lần cập nhật đếm ngược còn chờ)
+            session.renderer.close()
             embed = self._create_result_embed(session, winners, losers)
             try:
-                if session["message"]:
-                    await session["message"].edit(embed=embed)
+                await session.renderer.flush(embed, PRIORITY_RESULT)
             except Exception as e:
                 logger.error(f"Error updating result embed: {str(e)}")
                 # Try to send a new message instead if edit fails
                 try:
-                    channel = self.bot.get_channel(session["channel_id"])
+                    channel = self.bot.get_channel(session.channel_id)
                     if channel:
-                        await channel.send(embed=embed)
+                        await self.dispatcher.send(channel, PRIORITY_RESULT, embed=embed)
                 except Exception as inner_e:
                     logger.error(f"Error sending result message: {str(inner_e)}")
             
             # Remove session
-            del self.active_sessions[session_id]
+            self.sessions.close(session_id)
+            if self.journal.needs_compaction():
+                self.journal.compact(snapshot_sessions(self.sessions, self.scheduler.clock))
             
             logger.info(f"Ended session {session_id} with result {result} (total: {total})")
+            logger.debug(f"Game metrics: {self.metrics()}")
             
             # Start a new session automatically after a short delay
-            channel = self.bot.get_channel(session["channel_id"])
-            if channel:
-                await asyncio.sleep(5)  # Wait a bit before starting a new session
-                
-                # Create a new interaction-like object for the start_session method
-                class DummyInteraction:
-                    def __init__(self, channel_id):
-                        self.channel_id = channel_id
-                    
-                    async def response(self):
-                        pass
-                    
-                    async def original_response(self):
-                        pass
-                
-                try:
-                    # Cách mới: tạo trực tiếp một channel message thay vì dùng dummy interaction
-                    # Tạo message phiên mới và bắt đầu phiên
-                    embed = discord.Embed(
-                        title="🎲 Tài Xỉu - Phiên mới đã bắt đầu! 🎲",
-                        description="Đang chuẩn bị phiên mới...",
-                        color=discord.Color.gold()
-                    )
-                    # Gửi message trực tiếp vào channel
-                    new_message = await channel.send(embed=embed)
-                    
-                    # Tạo phiên mới trực tiếp thay vì dùng start_session
-                    session_id = f"session_{len(self.active_sessions) + 1}_{int(time.time())}"
-                    end_time = datetime.now() + timedelta(seconds=BETTING_WINDOW)
-                    
-                    # Tạo phiên mới
-                    self.active_sessions[session_id] = {
-                        "channel_id": session["channel_id"],
-                        "message": new_message,
-                        "end_time": end_time,
-                        "bets": {},
-                        "seed": None,
-                        "md5_hash": None
-                    }
-                    
-                    # Update embed 
-                    embed = self._create_session_embed(self.active_sessions[session_id])
-                    await new_message.edit(embed=embed)
-                    
-                    # Đặt lịch cập nhật và kết thúc phiên
-                    asyncio.create_task(self._update_session(session_id))
-                    
-                    logger.info(f"Started session {session_id} in channel {session['channel_id']}")
-                except Exception as e:
-                    logger.error(f"Error starting new session after previous one: {str(e)}")
-                
-                # Phiên mới đã được bắt đầu trực tiếp ở bước trước, không cần làm gì thêm
-                
+            self.scheduler.call_later(NEXT_ROUND_DELAY, self._restart_round, session.channel_id)
+            
         except Exception as e:
             logger.error(f"Error ending session {session_id}: {e}")
+            if settled is None:
+                # Chưa thanh toán: hủy phiên và trả lại tiền đang giữ
+                self.journal.record_abort(session_id)
+                try:
+                    await self._release_stakes(session)
+                except Exception as inner_e:
+                    logger.error(f"Error releasing stakes of session {session_id}: {inner_e}")
             # Try to remove the session anyway
-            if session_id in self.active_sessions:
-                del self.active_sessions[session_id]
+            session.renderer.close()
+            self.sessions.close(session_id)
+    
+    async def _restart_round(self, channel_id):
+        """Open the channel's next round (skipped if /tai_xiu already started one)."""
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            return
+        
+        new_session = self._open_session(channel_id)
+        if new_session is None:
+            return
+        self._journal_open(new_session)
+        
+        try:
+            embed = self._create_session_embed(new_session)
+            new_session.message = await self.dispatcher.send(
+                channel, PRIORITY_NEW_ROUND, embed=embed
+            )
+            self.journal.record_message(new_session.id, new_session.message.id)
+            
+            # Đặt lịch cập nhật và kết thúc phiên
+            self._schedule_round(new_session)
+            
+            logger.info(f"Started session {new_session.id} in channel {channel_id}")
+        except Exception as e:
+            logger.error(f"Error starting new session after previous one: {str(e)}")
+            await self._abort_session(new_session)
     
     async def place_bet(self, interaction, amount, bet_type):
         """Place a bet in the active session for the current channel."""
@@ -280,11 +353,7 @@ class TaiXiuGame:
         username = interaction.user.name
         
         # Find active session for this channel
-        active_session = None
-        for session_id, session in self.active_sessions.items():
-            if session["channel_id"] == channel_id:
-                active_session = session
-                break
+        active_session = self.sessions.for_channel(channel_id)
         
         if not active_session:
             await interaction.followup.send(
@@ -293,112 +362,149 @@ class TaiXiuGame:
             )
             return False
         
+        # Cược trước của người chơi phải được giữ tiền và ghi nhận xong rồi mới xét cược sau,
+        # nếu không hai lệnh đọc cùng một cược cũ và ghi đè lên nhau
+        async with self._bet_lock(user_id):
+            return await self._place_bet(interaction, active_session, user_id, username, amount, bet_type)
+    
+    @contextlib.asynccontextmanager
+    async def _bet_lock(self, user_id):
+        """Serialize one player's bets; the lock is dropped once nobody holds or waits for it."""
+        entry = self._bet_locks.get(user_id)
+        if entry is None:
+            entry = self._bet_locks[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._bet_locks[user_id]
+    
+    async def _place_bet(self, interaction, active_session, user_id, username, amount, bet_type):
+        """Validate a bet, reserve its stake and record it (holding the player's bet lock)."""
         # Check if betting window is still open
-        now = datetime.now()
-        if now >= active_session["end_time"]:
-            # Tính thời gian cho phiên tiếp theo
-            time_until_next = 5  # Đợi 5 giây sau khi kết thúc phiên hiện tại
-            
+        if not self._is_betting_open(active_session):
+            await self._send_betting_closed(interaction)
+            return False
+        
+        # Get or create player
+        player = await self.get_player(user_id, username)
+        # Số dư khả dụng = số dư trừ tiền đang giữ cho các cược chưa kết thúc (ở mọi kênh)
+        available_balance = player["balance"] - player["reserved"]
+        
+        # Validate bet type
+        if bet_type not in ["Tài", "Xỉu"]:
             await interaction.followup.send(
-                f"⏱️ **Quá thời gian đặt cược cho phiên này.** ⏱️\n"
-                f"Kết quả đang được xác định, phiên mới sẽ bắt đầu sau đó.\n"
-                f"Vui lòng đợi khoảng {time_until_next} giây để đặt cược vào phiên tiếp theo.",
+                "Loại cược không hợp lệ. Vui lòng chọn 'Tài' hoặc 'Xỉu'.",
                 ephemeral=True
             )
             return False
         
-        # Get or create player
-        player = self.db.get_or_create_player(user_id, username)
-        current_balance = player["balance"]
+        existing_bet = active_session.bets.get(user_id)
+        if existing_bet is not None and existing_bet.type == bet_type:
+            # Add to the existing bet
+            new_amount = existing_bet.amount + amount
+        else:
+            # New bet, or changing bet type replaces the bet entirely
+            new_amount = amount
+        
+        # Tiền cược cũ trong phiên này đã được giữ, chỉ cần giữ thêm phần chênh lệch
+        old_amount = existing_bet.amount if existing_bet is not None else 0
+        reserve_amount = new_amount - old_amount
         
-        # Validate bet amount
-        if not is_valid_bet_amount(amount, current_balance):
+        # Validate bet amount: mỗi lần cược ít nhất MIN_BET, tổng cược trong phiên không quá MAX_BET
+        if not isinstance(amount, int) or amount < MIN_BET:
+            await interaction.followup.send(
+                f"Số tiền cược không hợp lệ. Cược tối thiểu là {format_currency(MIN_BET)}.",
+                ephemeral=True
+            )
+            return False
+        if new_amount > MAX_BET:
+            await interaction.followup.send(
+                f"Tổng cược của bạn trong phiên ({format_currency(new_amount)}) sẽ vượt quá "
+                f"giới hạn tối đa ({format_currency(MAX_BET)}).",
+                ephemeral=True
+            )
+            return False
+        if reserve_amount > available_balance:
             await interaction.followup.send(
-                f"Số tiền cược không hợp lệ. Cược tối thiểu là {format_currency(MIN_BET)}, "
-                f"tối đa là {format_currency(MAX_BET)}, và không vượt quá số dư hiện tại của bạn ({format_currency(current_balance)}).",
+                f"Số dư khả dụng của bạn ({format_currency(available_balance)}) không đủ "
+                f"để cược thêm {format_currency(reserve_amount)}.",
                 ephemeral=True
             )
             return False
         
-        # Validate bet type
-        if bet_type not in ["Tài", "Xỉu"]:
+        # Giữ tiền nguyên tử: database là nơi quyết định cuối cùng (số dư trong cache có thể đã cũ)
+        reserved = await self.db.reserve_funds(user_id, reserve_amount)
+        if reserved is None:
+            # Số dư trong cache có thể đã cũ: đọc lại từ database ở lần sau
+            self.players.invalidate(user_id)
             await interaction.followup.send(
-                "Loại cược không hợp lệ. Vui lòng chọn 'Tài' hoặc 'Xỉu'.",
+                f"Số dư khả dụng của bạn không đủ để cược thêm {format_currency(reserve_amount)}.",
                 ephemeral=True
             )
             return False
         
-        # Update or create bet
-        if user_id in active_session["bets"]:
-            old_amount = active_session["bets"][user_id]["amount"]
-            old_type = active_session["bets"][user_id]["type"]
-            
-            # If changing bet type, update the bet entirely
-            if old_type != bet_type:
-                active_session["bets"][user_id] = {
-                    "amount": amount,
-                    "type": bet_type,
-                    "username": username,
-                    "time": now
-                }
-                
-                # Không sử dụng response.send_message - sẽ trả về True để bot.py xử lý thông báo
-                message = f"Đã đặt cược {format_currency(amount)} vào {bet_type}."
-            else:
-                # Otherwise, add to the existing bet
-                new_amount = old_amount + amount
-                if new_amount > MAX_BET:
-                    await interaction.followup.send(
-                        f"Tổng cược sẽ vượt quá giới hạn tối đa ({format_currency(MAX_BET)}).",
-                        ephemeral=True
-                    )
-                    return False
-                
-                if new_amount > current_balance:
-                    await interaction.followup.send(
-                        f"Tổng cược sẽ vượt quá số dư hiện tại của bạn ({format_currency(current_balance)}).",
-                        ephemeral=True
-                    )
-                    return False
-                
-                active_session["bets"][user_id]["amount"] = new_amount
-                active_session["bets"][user_id]["time"] = now
-                
-                # Không sử dụng response.send_message - sẽ trả về True để bot.py xử lý thông báo
-                message = f"Đã đặt cược {format_currency(amount)} vào {bet_type}."
-        else:
-            # Create new bet
-            active_session["bets"][user_id] = {
-                "amount": amount,
-                "type": bet_type,
-                "username": username,
-                "time": now
-            }
-            
-            # Không sử dụng response.send_message - sẽ trả về True để bot.py xử lý thông báo
-            message = f"Đã đặt cược {format_currency(amount)} vào {bet_type}."
-        
-        # Update session embed
-        try:
-            embed = self._create_session_embed(active_session)
-            if active_session["message"]:
-                await active_session["message"].edit(embed=embed)
-            else:
-                logger.warning(f"Session message is None for session in channel {channel_id}")
-        except Exception as e:
-            logger.error(f"Error updating session embed: {str(e)}")
-            # Tiếp tục thực hiện dù không cập nhật được embed
+        # Phiên có thể đã hết hạn trong lúc chờ database: trả lại tiền vừa giữ
+        if not self._is_betting_open(active_session):
+            reserved = await self.db.reserve_funds(user_id, -reserve_amount)
+            if reserved is not None:
+                self.players.update(user_id, reserved=reserved)
+            await self._send_betting_closed(interaction)
+            return False
+        
+        self.players.update(user_id, reserved=reserved)
+        bet = Bet(user_id, username, new_amount, bet_type, datetime.now())
+        active_session.set_bet(bet)
+        # Ghi journal trước khi xác nhận cược với người chơi
+        self.journal.record_bet(active_session.id, bet)
+        
+        # Không sử dụng response.send_message - sẽ trả về True để bot.py xử lý thông báo
+        message = f"Đã đặt cược {format_currency(amount)} vào {bet_type}."
+        
+        # Cập nhật embed ở nền (gộp nhiều cược thành một lần sửa tin nhắn)
+        active_session.renderer.mark_dirty(PRIORITY_BET)
         
         logger.info(f"User {username} ({user_id}) placed bet: {amount} on {bet_type}")
         
         return True
     
+    def metrics(self):
+        """Runtime counters: player cache hits/misses and the Discord dispatch queue."""
+        return {
+            "active_sessions": len(self.sessions),
+            "player_cache": self.players.stats(),
+            "dispatch": self.dispatcher.metrics(),
+        }
+    
+    async def get_player(self, user_id, username):
+        """Get (or create) a player, from the LRU cache when possible."""
+        player = self.players.get(user_id)
+        if player is None:
+            player = await self.db.get_or_create_player(user_id, username)
+            self.players.put(player)
+        return player
+    
+    def _is_betting_open(self, session):
+        """Bets are accepted until the round's deadline, and never once it is being settled."""
+        return session.result is None and self.scheduler.now() < session.deadline
+    
+    async def _send_betting_closed(self, interaction):
+        await interaction.followup.send(
+            f"⏱️ **Quá thời gian đặt cược cho phiên này.** ⏱️\n"
+            f"Kết quả đang được xác định, phiên mới sẽ bắt đầu sau đó.\n"
+            f"Vui lòng đợi khoảng {NEXT_ROUND_DELAY} giây để đặt cược vào phiên tiếp theo.",
+            ephemeral=True
+        )
+    
     async def show_history(self, interaction, user_id=None):
         """Show game history or a player's bet history."""
         if user_id:
             # Show player's bet history
             username = interaction.user.name
-            bet_history = self.db.get_player_bet_history(user_id)
+            bet_history = await self.db.get_player_bet_history(user_id)
             
             if not bet_history:
                 await interaction.followup.send(
@@ -414,20 +520,16 @@ class TaiXiuGame:
                 color=discord.Color.blue()
             )
             
-            # Add player balance
-            balance = self.db.get_player_balance(user_id)
+            # Số dư và thống kê trọn đời (một lần tra cứu theo khóa chính)
+            player = await self.db.get_player_stats(user_id)
             embed.add_field(
                 name="Số dư hiện tại",
-                value=format_currency(balance),
+                value=format_currency(player["balance"]),
                 inline=False
             )
             
             # Add bet history
             history_text = ""
-            win_count = 0
-            loss_count = 0
-            total_win = 0
-            total_loss = 0
             
             for bet in bet_history[:10]:  # Show first 10 entries in detail
                 result_emoji = "✅" if bet["result"] == "win" else "❌"
@@ -437,12 +539,8 @@ class TaiXiuGame:
                 
                 if bet["result"] == "win":
                     history_text += f"Thắng {format_currency(bet['win_amount'])}"
-                    win_count += 1
-                    total_win += bet["win_amount"]
                 else:
                     history_text += f"Thua {format_currency(abs(bet['win_amount']))}"
-                    loss_count += 1
-                    total_loss += abs(bet["win_amount"])
                 
                 history_text += f" | {dice_str} = {bet['total_value']} ({bet['game_result']})\n"
             
@@ -453,16 +551,15 @@ class TaiXiuGame:
             )
             
             # Add summary statistics
-            total_bets = win_count + loss_count
-            win_rate = (win_count / total_bets * 100) if total_bets > 0 else 0
+            win_rate = player["win_rate"]
             
             stats_text = (
-                f"Tổng số cược: {total_bets}\n"
-                f"Thắng: {win_count} ({win_rate:.1f}%)\n"
-                f"Thua: {loss_count} ({100-win_rate:.1f}%)\n"
-                f"Tổng thắng: {format_currency(total_win)}\n"
-                f"Tổng thua: {format_currency(total_loss)}\n"
-                f"Lợi nhuận: {format_currency(total_win - total_loss)}"
+                f"Tổng số cược: {player['total_bets']}\n"
+                f"Thắng: {player['win_count']} ({win_rate:.1f}%)\n"
+                f"Thua: {player['loss_count']} ({100-win_rate:.1f}%)\n"
+                f"Tổng thắng: {format_currency(player['total_won'])}\n"
+                f"Tổng thua: {format_currency(player['total_lost'])}\n"
+                f"Lợi nhuận: {format_currency(player['net_profit'])}"
             )
             
             embed.add_field(
@@ -475,7 +572,7 @@ class TaiXiuGame:
             
         else:
             # Show game history
-            game_history = self.db.get_game_history()
+            game_history = await self.db.get_game_history()
             
             if not game_history:
                 await interaction.followup.send(
@@ -511,6 +608,10 @@ class TaiXiuGame:
             if pattern_analysis["cau_nhip_nghieng"]:
                 patterns_detected.append("Cầu nhịp nghiêng: Có")
             
+            # Cầu tự định nghĩa trong config.CUSTOM_PATTERNS
+            for name in pattern_analysis["custom"]:
+                patterns_detected.append(f"{name}: Có")
+            
             if patterns_detected:
                 embed.add_field(
                     name="Phân tích mẫu",
@@ -569,22 +670,7 @@ class TaiXiuGame:
     
     def _create_session_embed(self, session):
         """Create an embed for the current game session."""
-        now = datetime.now()
-        time_left = max(0, int((session["end_time"] - now).total_seconds()))
-        
-        # Count total bets for each type
-        tai_bets = 0
-        xiu_bets = 0
-        tai_count = 0
-        xiu_count = 0
-        
-        for bet_info in session["bets"].values():
-            if bet_info["type"] == "Tài":
-                tai_bets += bet_info["amount"]
-                tai_count += 1
-            else:
-                xiu_bets += bet_info["amount"]
-                xiu_count += 1
+        time_left = max(0, round(session.deadline - self.scheduler.now()))
         
         # Tạo tiêu đề với biểu tượng thời gian phù hợp
         if time_left <= 5:
@@ -606,7 +692,7 @@ class TaiXiuGame:
             time_msg = f"Thời gian còn lại: **{time_left}s**"
         
         # Thêm cảnh báo tùy chỉnh nếu có
-        warning_msg = session.get("warning_message", "")
+        warning_msg = session.warning_message
         if warning_msg and time_left <= 10:
             time_msg = warning_msg
         
@@ -614,8 +700,8 @@ class TaiXiuGame:
             title=title,
             description=(
                 f"{time_msg}\n\n"
-                f"Tài (11-18): {tai_count} người, tổng {format_currency(tai_bets)}\n"
-                f"Xỉu (3-10): {xiu_count} người, tổng {format_currency(xiu_bets)}\n\n"
+                f"Tài (11-18): {session.tai_count} người, tổng {format_currency(session.tai_total)}\n"
+                f"Xỉu (3-10): {session.xiu_count} người, tổng {format_currency(session.xiu_total)}\n\n"
                 f"💎 **THẮNG NHẬN GẤP ĐÔI TIỀN CƯỢC** 💎\n\n"
                 f"Sử dụng lệnh `/tai_xiu dat_cuoc` để đặt cược.\n"
                 f"Số tiền cược từ {format_currency(MIN_BET)} đến {format_currency(MAX_BET)}."
@@ -630,19 +716,12 @@ class TaiXiuGame:
         ))
         
         # If there are bets, add them to the embed
-        if session["bets"]:
-            # Sort bets by time (most recent first)
-            sorted_bets = sorted(
-                session["bets"].items(),
-                key=lambda x: x[1]["time"],
-                reverse=True
-            )
-            
-            # Show up to 10 most recent bets
+        if session.recent_bets:
+            # Session chỉ giữ RECENT_BETS_SIZE cược mới nhất - hiển thị từ mới đến cũ
             recent_bets = []
-            for user_id, bet_info in sorted_bets[:10]:
+            for bet in reversed(session.recent_bets.values()):
                 recent_bets.append(
-                    f"{bet_info['username']}: {format_currency(bet_info['amount'])} ({bet_info['type']})"
+                    f"{bet.username}: {format_currency(bet.amount)} ({bet.type})"
                 )
             
             embed.add_field(
@@ -655,13 +734,13 @@ class TaiXiuGame:
     
     def _create_result_embed(self, session, winners, losers):
         """Create an embed for the game result."""
-        dice_str = " ".join([self._get_dice_emoji(val) for val in session["dice_values"]])
+        dice_str = " ".join([self._get_dice_emoji(val) for val in session.dice_values])
         
         # Calculate total win/loss
         total_win = sum(w["winnings"] for w in winners)
         total_loss = sum(abs(l["winnings"]) for l in losers)
         
-        if session["result"] == "Tài":
+        if session.result == "Tài":
             color = discord.Color.red()
             title_emoji = "🔴"
         else:
@@ -669,9 +748,9 @@ class TaiXiuGame:
             title_emoji = "⚫"
         
         embed = discord.Embed(
-            title=f"{title_emoji} Kết quả: {session['result']} {title_emoji}",
+            title=f"{title_emoji} Kết quả: {session.result} {title_emoji}",
             description=(
-                f"**{dice_str} = {session['total']}**\n\n"
+                f"**{dice_str} = {session.total}**\n\n"
                 f"Người thắng: {len(winners)}, tổng thắng: {format_currency(total_win)}\n"
                 f"Người thua: {len(losers)}, tổng thua: {format_currency(total_loss)}"
             ),
@@ -681,7 +760,7 @@ class TaiXiuGame:
         # Add winners
         if winners:
             winners_text = []
-            for winner in sorted(winners, key=lambda w: w["winnings"], reverse=True)[:10]:
+            for winner in heapq.nlargest(10, winners, key=lambda w: w["winnings"]):
                 winners_text.append(
                     f"{winner['username']}: +{format_currency(winner['winnings'])}"
                 )
@@ -695,7 +774,7 @@ class TaiXiuGame:
         # Add losers
         if losers:
             losers_text = []
-            for loser in sorted(losers, key=lambda l: abs(l["winnings"]), reverse=True)[:10]:
+            for loser in heapq.nlargest(10, losers, key=lambda l: abs(l["winnings"])):
                 losers_text.append(
                     f"{loser['username']}: -{format_currency(abs(loser['winnings']))}"
                 )
@@ -707,8 +786,8 @@ class TaiXiuGame:
             )
         
         # Add hash verification
-        seed = session.get("seed", "N/A")
-        md5_hash = session.get("md5_hash", "N/A")
+        seed = session.seed or "N/A"
+        md5_hash = session.md5_hash or "N/A"
         
         embed.add_field(
             name="Xác thực kết quả (MD5)",
@@ -738,5 +817,8 @@ class TaiXiuGame:
         return dice_emojis.get(value, "❓")
     
     def close(self):
-        """Close the database connection."""
+        """Stop the round timers and the Discord queue, then close the journal and the database."""
+        self.scheduler.close()
+        self.dispatcher.close()
+        self.journal.close()
         self.db.close()
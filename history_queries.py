@@ -0,0 +1,95 @@
+from config import MAX_PAGE_SIZE
+
+# Các truy vấn đọc lịch sử dùng chung cho database chính và database lưu trữ (archive)
+
+GAME_COLUMNS = "id, seed, md5_hash, dice1, dice2, dice3, total_value, result, created_at"
+
+def row_with_dice_list(row):
+    """Convert a row to a dict, folding dice1..dice3 into a dice_values list."""
+    data = dict(row)
+    data['dice_values'] = [data.pop('dice1'), data.pop('dice2'), data.pop('dice3')]
+    return data
+
+def clamp_page_size(limit):
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE."""
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def _keyset_filter(column, before_id, after_id):
+    """
+    Build the WHERE fragment of a keyset-paginated query on `column`.
+    Returns (conditions, params, order) - pages after `after_id` are read
+    oldest-first so the LIMIT keeps the rows right after the cursor.
+    """
+    conditions = []
+    params = []
+    if before_id is not None:
+        conditions.append(f"{column} < ?")
+        params.append(before_id)
+    if after_id is not None:
+        conditions.append(f"{column} > ?")
+        params.append(after_id)
+    order = "ASC" if after_id is not None and before_id is None else "DESC"
+    return conditions, params, order
+
+def query_game_history(conn, limit, before_id=None, after_id=None):
+    """Read one page of game_history from `conn`, newest first."""
+    conditions, params, order = _keyset_filter("id", before_id, after_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {GAME_COLUMNS} FROM game_history {where} ORDER BY id {order} LIMIT ?",
+        (*params, clamp_page_size(limit))
+    )
+    history = [row_with_dice_list(row) for row in cursor.fetchall()]
+
+    if order == "ASC":
+        history.reverse()
+    return history
+
+def query_game_results(conn, after_id, limit, columns="id, result"):
+    """
+    Read up to `limit` rows after `after_id`, oldest first (full-history scans).
+    `columns` must start with id, which is the cursor of the next batch.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {columns} FROM game_history WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, limit)
+    )
+    return [tuple(row) for row in cursor.fetchall()]
+
+def query_player_bet_history(conn, user_id, limit, before_id=None, after_id=None):
+    """Read one page of a player's bet_history from `conn`, newest first."""
+    conditions, params, order = _keyset_filter("bh.id", before_id, after_id)
+    where = " ".join(f"AND {condition}" for condition in conditions)
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT bh.*, gh.dice1, gh.dice2, gh.dice3, gh.total_value, gh.result as game_result
+            FROM bet_history bh
+            JOIN game_history gh ON bh.game_id = gh.id
+            WHERE bh.user_id = ? {where}
+            ORDER BY bh.id {order} LIMIT ?""",
+        (user_id, *params, clamp_page_size(limit))
+    )
+    history = [row_with_dice_list(row) for row in cursor.fetchall()]
+
+    if order == "ASC":
+        history.reverse()
+    return history
+
+def merge_pages(hot_rows, archived_rows, limit, before_id=None, after_id=None):
+    """
+    Merge a page read from the hot database with one read from the archive.
+    Rows present in both (mid-archival) are kept once; the result is newest first.
+    """
+    rows = {row['id']: row for row in archived_rows}
+    rows.update((row['id'], row) for row in hot_rows)
+    ordered = sorted(rows.values(), key=lambda row: row['id'], reverse=True)
+
+    limit = clamp_page_size(limit)
+    if after_id is not None and before_id is None:
+        # Trang sau after_id: giữ các dòng ngay sau con trỏ (cũ nhất)
+        return ordered[-limit:]
+    return ordered[:limit]
@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import time
+from config import JOURNAL_PATH, JOURNAL_FSYNC, JOURNAL_COMPACT_BYTES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Các loại bản ghi trong journal (mỗi dòng là một object JSON)
+OP_OPEN = "open"      # Mở phiên: kênh, tin nhắn (None nếu chưa gửi), hạn đặt cược (giờ hệ thống)
+OP_MESSAGE = "message"  # Tin nhắn của phiên đã được gửi
+OP_BET = "bet"        # Cược được chấp nhận: tổng cược hiện tại của người chơi trong phiên
+OP_SETTLE = "settle"  # Phiên đã được lưu kết quả và thanh toán
+OP_ABORT = "abort"    # Phiên bị hủy, không thanh toán
+
+def _open_record(session_id, channel_id, message_id, deadline):
+    return {"op": OP_OPEN, "session": session_id, "channel": channel_id,
+            "message": message_id, "deadline": deadline}
+
+def _bet_record(session_id, bet):
+    return {"op": OP_BET, "session": session_id, "user": bet.user_id,
+            "username": bet.username, "amount": bet.amount, "type": bet.type}
+
+
+class RoundJournal:
+    """
+    Append-only JSON-lines journal of round opens, accepted bets and settlements.
+
+    Each record is written and flushed before the action it describes is
+    acknowledged, so after a crash replay() returns every round that was
+    open, with its bets, and the game can resume or settle it. Deadlines are
+    stored as wall-clock timestamps because the monotonic clock does not
+    survive a restart. compact() rewrites the file with only the open rounds.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, fsync=JOURNAL_FSYNC, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.path = path
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def record_open(self, session_id, channel_id, message_id, deadline):
+        """
+        A round was opened; `deadline` is a time.time() timestamp. A round is
+        journaled before its message is sent, so `message_id` may be None.
+        """
+        self._append(_open_record(session_id, channel_id, message_id, deadline))
+
+    def record_message(self, session_id, message_id):
+        """The round's message was sent (it is opened without one, see record_open)."""
+        self._append({"op": OP_MESSAGE, "session": session_id, "message": message_id})
+
+    def record_bet(self, session_id, bet):
+        """A bet was accepted (bet.amount is the player's total stake in the round)."""
+        self._append(_bet_record(session_id, bet))
+
+    def record_settle(self, session_id):
+        self._append({"op": OP_SETTLE, "session": session_id})
+
+    def record_abort(self, session_id):
+        self._append({"op": OP_ABORT, "session": session_id})
+
+    def replay(self):
+        """
+        Read the journal and return the rounds still open, in opening order:
+        {session_id: {"channel", "message", "deadline", "bets": {user_id: record}}}.
+        """
+        return replay_journal(self.path)
+
+    def compact(self, open_rounds):
+        """
+        Rewrite the journal with only `open_rounds` (as returned by replay(), or
+        built from the live sessions) and reopen it for appending.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for session_id, round_info in open_rounds.items():
+                records = [_open_record(session_id, round_info["channel"],
+                                        round_info["message"], round_info["deadline"])]
+                records.extend(round_info["bets"].values())
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def needs_compaction(self):
+        return self._file.tell() > self.compact_bytes
+
+    def close(self):
+        self._file.close()
+
+
+def replay_journal(path):
+    """Replay a journal file (see RoundJournal.replay); a torn last line is ignored."""
+    rounds = {}
+    if not os.path.exists(path):
+        return rounds
+
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Dòng cuối có thể bị ghi dở khi tiến trình bị dừng
+                logger.warning(f"Skipping unreadable journal line {line_number}")
+                continue
+
+            op = record["op"]
+            session_id = record["session"]
+            if op == OP_OPEN:
+                rounds[session_id] = {
+                    "channel": record["channel"],
+                    "message": record["message"],
+                    "deadline": record["deadline"],
+                    "bets": {},
+                }
+            elif op == OP_MESSAGE:
+                round_info = rounds.get(session_id)
+                if round_info is not None:
+                    round_info["message"] = record["message"]
+            elif op == OP_BET:
+                round_info = rounds.get(session_id)
+                if round_info is not None:
+                    round_info["bets"][record["user"]] = record
+            else:
+                rounds.pop(session_id, None)
+
+    return rounds
+
+
+def wall_deadline(monotonic_deadline, clock=time.monotonic):
+    """Convert a monotonic deadline to a time.time() timestamp for the journal."""
+    return time.time() + (monotonic_deadline - clock())
+
+
+def snapshot_sessions(sessions, clock=time.monotonic):
+    """Describe live, unsettled sessions in replay() form (for compact())."""
+    rounds = {}
+    for session in sessions:
+        if session.result is not None:
+            continue
+        rounds[session.id] = {
+            "channel": session.channel_id,
+            "message": session.message.id if session.message is not None else None,
+            "deadline": wall_deadline(session.deadline, clock),
+            "bets": {bet.user_id: _bet_record(session.id, bet) for bet in session.bets.values()},
+        }
+    return rounds
@@ -0,0 +1,48 @@
+"""
+Các lệnh bảo trì database.
+
+    python manage.py rebuild-stats   # Tính lại các bảng thống kê từ lịch sử
+    python manage.py archive         # Chuyển lịch sử cũ sang database lưu trữ
+"""
+import argparse
+import logging
+from config import ARCHIVE_MAX_AGE_DAYS, ARCHIVE_KEEP_GAMES
+from archive import HistoryArchive, archive_history
+from database import Database
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tài Xỉu database maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild-stats", help="Rebuild the /stats rollup tables from game_history")
+    archive_parser = subparsers.add_parser("archive", help="Move old games and bets to the archive database")
+    archive_parser.add_argument("--max-age-days", type=int, default=ARCHIVE_MAX_AGE_DAYS,
+                                help="Archive games older than this many days")
+    archive_parser.add_argument("--keep-games", type=int, default=ARCHIVE_KEEP_GAMES,
+                                help="Always keep at most this many recent games in the main database")
+    archive_parser.add_argument("--vacuum", action="store_true",
+                                help="VACUUM the main database afterwards to shrink the file")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        if args.command == "rebuild-stats":
+            db.rebuild_stats()
+        elif args.command == "archive":
+            archive = db.archive or HistoryArchive(db.archive_path)
+            moved = archive_history(db, archive, args.max_age_days, args.keep_games)
+            logger.info(f"Moved {moved} games to {db.archive_path}")
+            if args.vacuum and moved:
+                db.vacuum()
+            archive.close()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
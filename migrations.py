@@ -0,0 +1,230 @@
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _create_base_tables(cursor):
+    """Create the original players, game_history and bet_history tables."""
+    # Players table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS players (
+        user_id TEXT PRIMARY KEY,
+        username TEXT NOT NULL,
+        balance INTEGER DEFAULT 1000000,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Game history table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS game_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        seed TEXT NOT NULL,
+        md5_hash TEXT NOT NULL,
+        dice_values TEXT NOT NULL,
+        total_value INTEGER NOT NULL,
+        result TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Bet history table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS bet_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        game_id INTEGER NOT NULL,
+        bet_amount INTEGER NOT NULL,
+        bet_type TEXT NOT NULL,
+        result TEXT NOT NULL,
+        win_amount INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES players (user_id),
+        FOREIGN KEY (game_id) REFERENCES game_history (id)
+    )
+    ''')
+
+
+def _index_bet_history_by_player(cursor):
+    """Index a player's bets newest-first for get_player_bet_history."""
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bet_history_user_id ON bet_history (user_id, id DESC)"
+    )
+
+
+def _split_dice_values(cursor):
+    """Replace the JSON dice_values column with three small integer columns."""
+    for column in ("dice1", "dice2", "dice3"):
+        cursor.execute(f"ALTER TABLE game_history ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
+    cursor.execute('''
+    UPDATE game_history
+    SET dice1 = json_extract(dice_values, '$[0]'),
+        dice2 = json_extract(dice_values, '$[1]'),
+        dice3 = json_extract(dice_values, '$[2]')
+    ''')
+
+    cursor.execute("ALTER TABLE game_history DROP COLUMN dice_values")
+
+
+def rebuild_stats(cursor):
+    """Recompute the statistics rollup tables from game_history."""
+    cursor.execute("DELETE FROM stats_result")
+    cursor.execute("DELETE FROM stats_dice_face")
+    cursor.execute("DELETE FROM stats_total")
+
+    cursor.execute('''
+    INSERT INTO stats_result (result, count)
+    SELECT result, COUNT(*) FROM game_history GROUP BY result
+    ''')
+    cursor.execute('''
+    INSERT INTO stats_dice_face (face, count)
+    SELECT face, COUNT(*) FROM (
+        SELECT dice1 AS face FROM game_history
+        UNION ALL SELECT dice2 FROM game_history
+        UNION ALL SELECT dice3 FROM game_history
+    ) GROUP BY face
+    ''')
+    cursor.execute('''
+    INSERT INTO stats_total (total_value, count)
+    SELECT total_value, COUNT(*) FROM game_history GROUP BY total_value
+    ''')
+
+
+def _create_stats_rollups(cursor):
+    """Create the rollup tables behind /stats and fill them from existing games."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS stats_result (
+        result TEXT PRIMARY KEY,
+        count INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS stats_dice_face (
+        face INTEGER PRIMARY KEY,
+        count INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS stats_total (
+        total_value INTEGER PRIMARY KEY,
+        count INTEGER NOT NULL
+    )
+    ''')
+    rebuild_stats(cursor)
+
+
+def _add_player_stats(cursor):
+    """Add lifetime bet aggregates to players and fill them from bet_history."""
+    for column in ("win_count", "loss_count", "total_won", "total_lost"):
+        cursor.execute(f"ALTER TABLE players ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
+    cursor.execute('''
+    UPDATE players
+    SET win_count = s.win_count,
+        loss_count = s.loss_count,
+        total_won = s.total_won,
+        total_lost = s.total_lost
+    FROM (
+        SELECT user_id,
+               SUM(result = 'win') AS win_count,
+               SUM(result != 'win') AS loss_count,
+               SUM(CASE WHEN result = 'win' THEN win_amount ELSE 0 END) AS total_won,
+               SUM(CASE WHEN result = 'win' THEN 0 ELSE ABS(win_amount) END) AS total_lost
+        FROM bet_history
+        GROUP BY user_id
+    ) AS s
+    WHERE players.user_id = s.user_id
+    ''')
+
+
+def _index_bet_history_by_game(cursor):
+    """Index bets by game so archival can move a range of games with their bets."""
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bet_history_game_id ON bet_history (game_id)"
+    )
+
+
+def _index_players_by_balance(cursor):
+    """Index players by balance so the leaderboard and rank lookups don't scan the table."""
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_balance ON players (balance, user_id)"
+    )
+
+
+def _add_player_reserved(cursor):
+    """Add the amount of a player's balance held by bets that are not settled yet."""
+    cursor.execute("ALTER TABLE players ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0")
+
+
+def _add_game_round_id(cursor):
+    """Record which bot round produced each game, so a round is never settled twice."""
+    cursor.execute("ALTER TABLE game_history ADD COLUMN round_id TEXT")
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_game_history_round_id ON game_history (round_id)"
+    )
+
+
+# (version, description, function) - chỉ được thêm vào cuối, không sửa migration cũ
+MIGRATIONS = [
+    (1, "Create base tables", _create_base_tables),
+    (2, "Index bet_history by user_id, id", _index_bet_history_by_player),
+    (3, "Store dice as dice1, dice2, dice3 integer columns", _split_dice_values),
+    (4, "Add statistics rollup tables", _create_stats_rollups),
+    (5, "Add lifetime bet aggregates to players", _add_player_stats),
+    (6, "Index bet_history by game_id", _index_bet_history_by_game),
+    (7, "Index players by balance", _index_players_by_balance),
+    (8, "Add reserved (escrow) amount to players", _add_player_reserved),
+    (9, "Add round_id to game_history", _add_game_round_id),
+]
+
+
+def get_schema_version(conn):
+    """Return the schema version of a database (0 if never migrated)."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(conn):
+    """Apply every pending migration, each one in its own transaction."""
+    current_version = get_schema_version(conn)
+    conn.commit()
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Đọc lại phiên bản khi đã giữ khóa ghi: một tiến trình khác mở cùng
+            # database có thể đã áp dụng migration này trong lúc chờ
+            current_version = cursor.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+            if version <= current_version:
+                conn.rollback()
+                continue
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {version} ({description}) failed")
+            raise
+
+        logger.info(f"Applied migration {version}: {description}")
+
+    return max(current_version, MIGRATIONS[-1][0])
@@ -0,0 +1,140 @@
+import logging
+import time
+from config import PATTERN_INDEX_MAX_LENGTH
+from result_history import RESULT_BITS, RESULT_NAMES, TAI_BIT, XIU_BIT
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Ký hiệu viết tắt khi tra cứu: T = Tài, X = Xỉu
+RESULT_LETTERS = {"T": TAI_BIT, "X": XIU_BIT}
+
+
+def parse_results(text):
+    """
+    Parse a searched sequence such as "TTXT" or "T-T-X-T" (oldest first) into
+    result bits. Raises ValueError on anything but T/X letters.
+    """
+    letters = [c for c in text.upper() if c not in " ,-"]
+    if not letters or any(c not in RESULT_LETTERS for c in letters):
+        raise ValueError("Chuỗi cần tìm chỉ gồm T (Tài) và X (Xỉu), ví dụ TTXT")
+    return [RESULT_LETTERS[c] for c in letters]
+
+
+class PatternIndex:
+    """
+    Counts of every result sequence of 1..max_length games in the full
+    history, with what came right after each one.
+
+    For each length n a sequence is an n-bit key. Three tables per length
+    are kept, indexed by key:
+    - how often the sequence occurred,
+    - which result followed it, stored under key * 2 + next bit,
+    - where it last ended.
+    A search is then a few list lookups, however long the history is.
+
+    build() indexes a whole history in one pass over the longest sequences
+    and derives the shorter ones by folding the tables. append() updates
+    every length for one new game in O(max_length).
+    """
+
+    def __init__(self, max_length=PATTERN_INDEX_MAX_LENGTH):
+        self.max_length = max_length
+        self.count = 0          # Số ván đã được đánh chỉ mục
+        self.last_game_id = 0   # id của ván cuối cùng (để đọc tiếp các ván mới)
+        self._window = 0        # max_length kết quả cuối, kết quả mới nhất ở bit thấp nhất
+        # Bảng cho từng độ dài n (phần tử 0 không dùng)
+        self._occurrences = [None] + [[0] * (1 << n) for n in range(1, max_length + 1)]
+        self._next = [None] + [[0] * (2 << n) for n in range(1, max_length + 1)]
+        self._last_end = [None] + [[0] * (1 << n) for n in range(1, max_length + 1)]  # vị trí + 1, 0 = chưa gặp
+
+    def build(self, game_results):
+        """Index an iterable of (game_id, result) from an empty index, oldest first."""
+        if self.count:
+            raise ValueError("build() needs an empty index; use append() for new games")
+
+        start = time.perf_counter()
+        longest = self.max_length
+        full_mask = (1 << longest) - 1
+        occurrences = self._occurrences[longest]
+        following = self._next[longest]
+        last_end = self._last_end[longest]
+        window = 0
+        count = 0
+        game_id = 0
+        for game_id, result in game_results:
+            bit = RESULT_BITS[result]
+            # Kết quả này theo sau chuỗi kết thúc ở ván trước; mấy ván đầu chưa đủ max_length
+            if count >= longest:
+                following[window << 1 | bit] += 1
+            elif count:
+                self._next[count][window << 1 | bit] += 1
+            window = (window << 1 | bit) & full_mask
+            count += 1
+            if count >= longest:
+                occurrences[window] += 1
+                last_end[window] = count
+            else:
+                self._occurrences[count][window] += 1
+                self._last_end[count][window] = count
+
+        # Chuỗi độ dài n = n bit thấp của chuỗi độ dài n + 1: cộng dồn từ dài xuống ngắn
+        for n in range(longest - 1, 0, -1):
+            high = 1 << n
+            occurrences, longer = self._occurrences[n], self._occurrences[n + 1]
+            last_end, longer_last = self._last_end[n], self._last_end[n + 1]
+            for key in range(high):
+                occurrences[key] += longer[key] + longer[key | high]
+                last_end[key] = max(last_end[key], longer_last[key], longer_last[key | high])
+            following, longer_next = self._next[n], self._next[n + 1]
+            for key in range(2 * high):
+                following[key] += longer_next[key] + longer_next[key | high << 1]
+
+        self._window = window
+        self.count = count
+        self.last_game_id = game_id
+        logger.info(f"Indexed {count} game results in {time.perf_counter() - start:.2f}s")
+
+    def append(self, result, game_id=None):
+        """Index one new game ("Tài" or "Xỉu")."""
+        bit = RESULT_BITS[result]
+        window = self._window
+        for n in range(1, min(self.count, self.max_length) + 1):
+            self._next[n][(window & ((1 << n) - 1)) << 1 | bit] += 1
+
+        window = (window << 1 | bit) & ((1 << self.max_length) - 1)
+        self.count += 1
+        for n in range(1, min(self.count, self.max_length) + 1):
+            key = window & ((1 << n) - 1)
+            self._occurrences[n][key] += 1
+            self._last_end[n][key] = self.count
+        self._window = window
+        if game_id is not None:
+            self.last_game_id = game_id
+
+    def search(self, bits):
+        """
+        Look up a sequence of result bits (oldest first): how often it
+        occurred, what came next, and how many games ago it last ended.
+        """
+        length = len(bits)
+        if not 1 <= length <= self.max_length:
+            raise ValueError(f"Chuỗi cần tìm phải dài từ 1 đến {self.max_length} kết quả")
+
+        key = 0
+        for bit in bits:
+            key = key << 1 | bit
+        last_end = self._last_end[length][key]
+        next_tai = self._next[length][key << 1 | TAI_BIT]
+        next_xiu = self._next[length][key << 1 | XIU_BIT]
+        followed = next_tai + next_xiu
+        return {
+            "pattern": [RESULT_NAMES[bit] for bit in bits],
+            "occurrences": self._occurrences[length][key],
+            "next": {"Tài": next_tai, "Xỉu": next_xiu},
+            "next_tai_rate": round(next_tai / followed * 100, 1) if followed else None,
+            "last_seen_games_ago": self.count - last_end if last_end else None,
+            "indexed_games": self.count,
+        }
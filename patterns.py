@@ -1,184 +1,277 @@
+import random
+from collections import deque
+from config import RESULT_HISTORY_CAPACITY, CUSTOM_PATTERNS
+from result_history import ResultHistory, RESULT_BITS, RESULT_NAMES
+
+
+def parse_pattern(spec):
+    """
+    Parse a cầu definition into its A/B form.
+
+    Two notations are accepted:
+    - A/B symbols, e.g. "AAABBA": A and B stand for two different results,
+      so the pattern matches both "Tài Tài Tài Xỉu Xỉu Tài" and its mirror.
+    - Run lengths, e.g. "3-2-1": runs of alternating results, same as "AAABBA".
+    A pattern matches when the latest results end with it; the first run
+    may be longer than written (like the original fixed windows).
+    """
+    spec = spec.strip().upper()
+    if spec and set(spec) <= {"A", "B"}:
+        return spec
+
+    try:
+        runs = [int(part) for part in spec.split("-")]
+    except ValueError:
+        raise ValueError(f"Invalid pattern {spec!r}: use A/B symbols or run lengths like 3-2-1")
+    if not runs or min(runs) < 1:
+        raise ValueError(f"Invalid pattern {spec!r}: run lengths must be positive")
+    return "".join(("A" if i % 2 == 0 else "B") * run for i, run in enumerate(runs))
+
+
+def _changes(symbols):
+    """A/B pattern -> changes between consecutive results ("1" = different), mirror-invariant."""
+    return "".join("0" if a == b else "1" for a, b in zip(symbols, symbols[1:]))
+
+
+class PatternSet:
+    """
+    All registered cầu patterns compiled into one Aho-Corasick automaton.
+
+    Patterns are matched on the sequence of changes between consecutive
+    results (same / different), which makes A/B patterns independent of
+    which result is A. Every state has a transition for both inputs and the
+    set of patterns ending there (as a bitmask), so one step per new result
+    evaluates every pattern at once, however many are registered.
+    """
+
+    def __init__(self, patterns):
+        # patterns: [(name, spec)] - tên trùng nhau thì mẫu sau thay mẫu trước
+        self.names = []
+        self.specs = {}
+        self.bits = {}
+        goto = [{}]
+        outputs = [0]
+        for name, spec in dict(patterns).items():
+            symbols = parse_pattern(spec)
+            bit = 1 << len(self.names)
+            self.names.append(name)
+            self.specs[name] = symbols
+            self.bits[name] = bit
+
+            state = 0
+            for change in _changes(symbols):
+                if change not in goto[state]:
+                    goto.append({})
+                    outputs.append(0)
+                    goto[state][change] = len(goto) - 1
+                state = goto[state][change]
+            outputs[state] |= bit
+
+        # BFS: liên kết fail và bảng chuyển trạng thái đầy đủ cho "0"/"1"
+        self.transitions = [None] * len(goto)
+        fail = [0] * len(goto)
+        self.transitions[0] = tuple(goto[0].get(change, 0) for change in "01")
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            row = []
+            for i, change in enumerate("01"):
+                child = goto[state].get(change)
+                if child is None:
+                    row.append(self.transitions[fail[state]][i])
+                else:
+                    fail[child] = self.transitions[fail[state]][i]
+                    queue.append(child)
+                    row.append(child)
+            self.transitions[state] = tuple(row)
+        self.outputs = outputs
+
+    def __len__(self):
+        return len(self.names)
+
+    def mask(self, names):
+        """Bitmask of the given pattern names (unknown names are ignored)."""
+        mask = 0
+        for name in names:
+            mask |= self.bits.get(name, 0)
+        return mask
+
+    def names_of(self, mask):
+        """Names of the patterns in a bitmask returned by matches()."""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def matches(self, state, count):
+        """Bitmask of patterns ending at `state`, after `count` results."""
+        # Chưa có kết quả nào thì không mẫu nào khớp (kể cả mẫu một kết quả, nằm ở gốc)
+        return self.outputs[state] if count else 0
+
+    def match(self, history):
+        """One pass over a result list (oldest first): names of the patterns at its tail."""
+        state = 0
+        previous = None
+        for i, result in enumerate(history):
+            if i:
+                state = self.transitions[state][result != previous]
+            previous = result
+        return self.names_of(self.matches(state, len(history)))
+
+
+# Năm cầu có sẵn, viết lại bằng độ dài các lượt
+CAU_PATTERNS = [
+    ("cau_bet", "3"),                          # AAA: ít nhất 3 kết quả giống nhau
+    ("cau_dao_1_1", "1-1-1-1"),                # ABAB: ít nhất 4 kết quả luân phiên
+    ("cau_3_2_1", "3-2-1"),                    # AAABBA
+    ("cau_dao_1_2_3", "1-2-3"),                # ABBAAA
+    ("cau_nhip_nghieng", "2-1-1-2-2-3-1"),     # AABABBAABBBA
+]
+
+DEFAULT_PATTERNS = PatternSet(CAU_PATTERNS + list(CUSTOM_PATTERNS.items()))
+
+
 class PatternAnalyzer:
     """
     Class to analyze game patterns (cầu) in Tài Xỉu game.
-    
+
     Patterns include:
     - Cầu bệt (Flat pattern): Same result appears multiple times in a row
     - Cầu đảo 1-1 (1-1 alternating pattern): Results alternate between Tài and Xỉu
     - Cầu 3-2-1 (3-2-1 pattern): Pattern with 3 of one result, then 2, then 1
     - Cầu đảo 1-2-3 (1-2-3 alternating pattern): Pattern with 1 of one result, then 2, then 3
     - Cầu nhịp nghiêng (Tilted rhythm pattern): Complex pattern with irregular alternation
+    - Any custom pattern from config.CUSTOM_PATTERNS
+
+    Every pattern is evaluated by one PatternSet automaton step per
+    append_result; the current run and alternation lengths (shown for cầu
+    bệt and cầu đảo 1-1) are kept alongside in O(1). Results are compared
+    as bits and the last `capacity` of them are kept in a ResultHistory.
     """
-    
-    def __init__(self, history=None):
-        self.history = history or []
-    
+
+    def __init__(self, history=None, capacity=RESULT_HISTORY_CAPACITY, patterns=DEFAULT_PATTERNS):
+        self.capacity = capacity
+        self.patterns = patterns
+        # Cầu tự định nghĩa = mọi mẫu không thuộc năm cầu có sẵn
+        self._custom_mask = patterns.mask(patterns.names) & ~patterns.mask(dict(CAU_PATTERNS))
+        self.set_history(history or [])
+
     def set_history(self, history):
-        """Set the game history to analyze."""
-        self.history = history
-    
+        """Set the game history to analyze (oldest result first)."""
+        self.history = ResultHistory(self.capacity)
+        self.count = 0
+        self._last = None         # Bit của kết quả cuối (TAI_BIT / XIU_BIT)
+        self._streak = 0          # Độ dài lượt hiện tại
+        self._alternating = 0     # Số kết quả luân phiên liên tiếp ở cuối
+        self._state = 0           # Trạng thái của automaton PatternSet
+        for result in history:
+            self.append_result(result)
+
     def append_result(self, result):
-        """Append a new result to the history."""
-        self.history.append(result)
-    
+        """Append a new result ("Tài" or "Xỉu") to the history."""
+        bit = RESULT_BITS[result]
+        if self.count:
+            changed = bit != self._last
+            self._state = self.patterns.transitions[self._state][changed]
+            if changed:
+                self._streak = 1
+                self._alternating += 1
+            else:
+                self._streak += 1
+                self._alternating = 1
+        else:
+            self._streak = 1
+            self._alternating = 1
+        self._last = bit
+        self.count += 1
+        self.history.append(bit)
+
     def get_last_results(self, count=10):
         """Get the last N results."""
-        return self.history[-count:] if len(self.history) >= count else self.history
-    
+        return self.history.last_results(count)
+
+    def matched_patterns(self):
+        """Names of every registered pattern the latest results end with."""
+        return self.patterns.names_of(self.match_mask())
+
+    def match_mask(self):
+        """Bitmask of matching patterns (PatternSet.names_of turns it into names)."""
+        return self.patterns.matches(self._state, self.count)
+
+    def _matched(self, name):
+        return bool(self.match_mask() & self.patterns.bits.get(name, 0))
+
     def detect_cau_bet(self, min_streak=3):
         """
         Detect Cầu bệt (Flat pattern) - same result appears multiple times in a row.
         Returns the current streak and the dominant result.
         """
-        if not self.history:
-            return 0, None
-        
-        current_streak = 1
-        current_result = self.history[-1]
-        
-        # Count backward to find the streak
-        for i in range(len(self.history) - 2, -1, -1):
-            if self.history[i] == current_result:
-                current_streak += 1
-            else:
-                break
-        
-        if current_streak >= min_streak:
-            return current_streak, current_result
+        if self._streak >= min_streak:
+            return self._streak, RESULT_NAMES[self._last]
         else:
             return 0, None
-    
+
     def detect_cau_dao_1_1(self, min_length=4):
         """
         Detect Cầu đảo 1-1 (1-1 alternating pattern) - results alternate between Tài and Xỉu.
         Returns the length of the alternating pattern.
         """
-        if len(self.history) < min_length:
-            return 0
-        
-        alternating_count = 1
-        
-        # Count backward to find alternating pattern
-        for i in range(len(self.history) - 2, -1, -1):
-            if self.history[i] != self.history[i+1]:
-                alternating_count += 1
-            else:
-                break
-        
-        if alternating_count >= min_length:
-            return alternating_count
+        if self._alternating >= min_length:
+            return self._alternating
         else:
             return 0
-    
+
     def detect_cau_3_2_1(self):
         """
         Detect Cầu 3-2-1 (3-2-1 pattern) - Pattern with 3 of one result, then 2 of another, then 1.
         Returns True if the pattern is detected, False otherwise.
         """
-        if len(self.history) < 6:
-            return False
-        
-        # Get the last 6 results
-        last_six = self.history[-6:]
-        
-        # Check if first 3 are the same
-        if not (last_six[0] == last_six[1] == last_six[2]):
-            return False
-        
-        # Check if next 2 are the same but different from the first 3
-        if not (last_six[3] == last_six[4] and last_six[3] != last_six[0]):
-            return False
-        
-        # Check if the last one is different from the previous 2
-        if last_six[5] == last_six[3]:
-            return False
-        
-        return True
-    
+        return self._matched("cau_3_2_1")
+
     def detect_cau_dao_1_2_3(self):
         """
         Detect Cầu đảo 1-2-3 (1-2-3 alternating pattern) - Pattern with 1 of one result, then 2, then 3.
         Returns True if the pattern is detected, False otherwise.
         """
-        if len(self.history) < 6:
-            return False
-        
-        # Get the last 6 results
-        last_six = self.history[-6:]
-        
-        # Define the expected pattern: 1 of A, 2 of B, 3 of A
-        result_a = last_six[0]
-        result_b = None
-        
-        # Check the second result is different
-        if last_six[1] == result_a:
-            return False
-        result_b = last_six[1]
-        
-        # Check the pattern
-        expected_pattern = [result_a, result_b, result_b, result_a, result_a, result_a]
-        
-        return last_six == expected_pattern
-    
+        return self._matched("cau_dao_1_2_3")
+
     def detect_cau_nhip_nghieng(self):
         """
         Detect Cầu nhịp nghiêng (Tilted rhythm pattern) - Complex pattern with irregular alternation.
         This is more complex and can be defined in various ways.
         One definition could be: A, A, B, A, B, B, A, A, B, B, B, A
-        
+
         Returns True if the pattern is detected, False otherwise.
         """
-        if len(self.history) < 12:
-            return False
-        
-        # Get the last 12 results
-        last_twelve = self.history[-12:]
-        
-        # Define result A as the first result
-        result_a = last_twelve[0]
-        
-        # Find the first occurrence of a different result
-        result_b = None
-        for result in last_twelve:
-            if result != result_a:
-                result_b = result
-                break
-        
-        if result_b is None:  # All results are the same
-            return False
-        
-        # Define the expected tilted rhythm pattern
-        expected_pattern = [
-            result_a, result_a, result_b, 
-            result_a, result_b, result_b, 
-            result_a, result_a, result_b, 
-            result_b, result_b, result_a
-        ]
-        
-        return last_twelve == expected_pattern
-    
+        return self._matched("cau_nhip_nghieng")
+
     def analyze_patterns(self):
         """Analyze all patterns and return a summary."""
         results = {
-            "cau_bet": self.detect_cau_bet(),
-            "cau_dao_1_1": self.detect_cau_dao_1_1(),
+            "cau_bet": self.detect_cau_bet() if self._matched("cau_bet") else (0, None),
+            "cau_dao_1_1": self.detect_cau_dao_1_1() if self._matched("cau_dao_1_1") else 0,
             "cau_3_2_1": self.detect_cau_3_2_1(),
             "cau_dao_1_2_3": self.detect_cau_dao_1_2_3(),
-            "cau_nhip_nghieng": self.detect_cau_nhip_nghieng()
+            "cau_nhip_nghieng": self.detect_cau_nhip_nghieng(),
+            # Các cầu tự định nghĩa đang khớp (theo thứ tự đăng ký)
+            "custom": self.patterns.names_of(self.match_mask() & self._custom_mask)
         }
-        
+
         return results
-    
+
     def suggest_next_bet(self):
         """
         Suggest the next bet based on pattern analysis.
         This is intentionally made to be random so players must discover patterns.
         """
-        if not self.history:
+        if self._last is None:
             return None
-        
+
         # Randomize the suggestion to make players discover patterns
         if random.random() < 0.5:
-            return "Tài" if self.history[-1] == "Xỉu" else "Xỉu"
+            return RESULT_NAMES[self._last ^ 1]
         else:
-            return self.history[-1]  # Suggest the same as last result
+            return RESULT_NAMES[self._last]  # Suggest the same as last result
@@ -0,0 +1,79 @@
+import logging
+from collections import OrderedDict
+from config import PLAYER_CACHE_SIZE
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class PlayerCache:
+    """
+    Bounded LRU cache of players (user_id -> username, balance, reserved).
+
+    Only the game changes balances and reservations, and every change is
+    written to the database first and then copied here (write-through) with
+    the values the database returned, so a cached entry is never ahead of
+    SQLite. The web app runs in the same process (main.py starts the bot in
+    a thread) but only reads SQLite and never uses this cache.
+    """
+
+    def __init__(self, capacity=PLAYER_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._players = OrderedDict()
+
+    def get(self, user_id):
+        """Return a copy of the cached player, or None (counted as a miss)."""
+        player = self._players.get(user_id)
+        if player is None:
+            self.misses += 1
+            return None
+
+        self._players.move_to_end(user_id)
+        self.hits += 1
+        return dict(player)
+
+    def put(self, player):
+        """Cache a player row read from or returned by the database."""
+        user_id = player["user_id"]
+        self._players[user_id] = {
+            "user_id": user_id,
+            "username": player["username"],
+            "balance": player["balance"],
+            "reserved": player["reserved"],
+        }
+        self._players.move_to_end(user_id)
+        if len(self._players) > self.capacity:
+            self._players.popitem(last=False)
+
+    def update(self, user_id, **fields):
+        """Write-through: apply fields already committed to the database (no-op if not cached)."""
+        player = self._players.get(user_id)
+        if player is not None:
+            player.update(fields)
+
+    def invalidate(self, user_id):
+        """Drop a player whose cached values may be stale."""
+        self._players.pop(user_id, None)
+
+    def clear(self):
+        self._players.clear()
+
+    def stats(self):
+        """Hit/miss counters - every hit is a database read saved."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._players),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._players)
+
+    def __contains__(self, user_id):
+        return user_id in self._players
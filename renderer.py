@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from config import EMBED_MIN_EDIT_INTERVAL
+from dispatch import PRIORITY_COUNTDOWN
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SessionRenderer:
+    """
+    Debounced, coalescing editor for one session's message.
+
+    Callers mark the embed dirty instead of editing it. At most one edit is
+    in flight, consecutive edits are at least `min_interval` seconds apart,
+    and the embed is built right before sending, so any number of changes in
+    between collapse into one edit showing the latest state. flush() skips
+    the wait for countdown milestones and the result. Edits are sent through
+    the bot-wide DiscordDispatcher, which also keeps edits of one message in
+    order and drops an edit that a newer one supersedes.
+    """
+
+    def __init__(self, session, build_embed, dispatcher, min_interval=EMBED_MIN_EDIT_INTERVAL):
+        self.session = session
+        self.build_embed = build_embed
+        self.dispatcher = dispatcher
+        self.min_interval = min_interval
+        self.edits = 0
+
+        self._dirty = False
+        self._priority = PRIORITY_COUNTDOWN
+        self._task = None
+        self._last_edit = None
+
+    def mark_dirty(self, priority=PRIORITY_COUNTDOWN):
+        """Schedule an edit with the session's latest state (returns immediately)."""
+        self._dirty = True
+        self._priority = min(self._priority, priority)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Background task: wait out the interval, then edit while changes keep coming."""
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            if self._last_edit is not None:
+                wait = self._last_edit + self.min_interval - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            if not self._dirty:
+                break
+            try:
+                await self._edit(priority=self._priority)
+            except Exception as e:
+                logger.error(f"Error updating session embed for {self.session.id}: {e}")
+
+    async def _edit(self, embed=None, priority=PRIORITY_COUNTDOWN):
+        """Queue one edit on the dispatcher and wait until it is sent (or superseded)."""
+        self._dirty = False
+        self._priority = PRIORITY_COUNTDOWN
+        if self.session.message is None:
+            return
+        if embed is None:
+            embed = self.build_embed(self.session)
+        try:
+            if await self.dispatcher.edit(self.session.message, embed, priority) is not None:
+                self.edits += 1
+        finally:
+            self._last_edit = asyncio.get_running_loop().time()
+
+    async def flush(self, embed=None, priority=PRIORITY_COUNTDOWN):
+        """Edit right away, optionally with a given embed, skipping the debounce interval."""
+        await self._edit(embed, priority)
+
+    def close(self):
+        """Stop any pending debounced edit."""
+        self._dirty = False
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
@@ -0,0 +1,90 @@
+from config import RESULT_HISTORY_CAPACITY
+
+# Mỗi kết quả là một bit: 1 = Tài, 0 = Xỉu
+TAI_BIT = 1
+XIU_BIT = 0
+RESULT_BITS = {"Tài": TAI_BIT, "Xỉu": XIU_BIT}
+RESULT_NAMES = ("Xỉu", "Tài")
+
+
+class ResultHistory:
+    """
+    Bounded Tài/Xỉu history packed one bit per result.
+
+    The bytearray grows (doubling) until it holds `capacity` results, then
+    works as a ring buffer that overwrites the oldest result, so memory
+    stays at capacity / 8 bytes. Results are read back as bits; the
+    capacity is rounded up to a whole byte.
+    """
+
+    def __init__(self, capacity=RESULT_HISTORY_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = (capacity + 7) // 8 * 8
+        self._bits = bytearray(min(self.capacity // 8, 64))
+        self._start = 0  # Vị trí (bit) của kết quả cũ nhất khi buffer đã đầy
+        self._len = 0
+
+    def append(self, bit):
+        """Append a result bit (TAI_BIT or XIU_BIT), dropping the oldest when full."""
+        if self._len < self.capacity:
+            position = self._len
+            if position >> 3 >= len(self._bits):
+                self._bits.extend(bytes(min(len(self._bits), self.capacity // 8 - len(self._bits))))
+            self._len += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        if bit:
+            self._bits[position >> 3] |= 1 << (position & 7)
+        else:
+            self._bits[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+
+    def _position(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("result history index out of range")
+        return (self._start + index) % self.capacity
+
+    def __getitem__(self, index):
+        """Result bit at a logical index (0 = oldest, -1 = latest)."""
+        position = self._position(index)
+        return self._bits[position >> 3] >> (position & 7) & 1
+
+    def __len__(self):
+        return self._len
+
+    def tail(self, count):
+        """The last `count` result bits as an int, oldest in the most significant bit."""
+        value = 0
+        for index in range(max(self._len - count, 0), self._len):
+            value = value << 1 | self[index]
+        return value
+
+    def last_results(self, count):
+        """The last `count` results as "Tài"/"Xỉu" strings, oldest first."""
+        return [RESULT_NAMES[self[index]] for index in range(max(self._len - count, 0), self._len)]
+
+    def streak(self):
+        """Length of the run of identical results at the end (8 per step over whole bytes)."""
+        if not self._len:
+            return 0
+        last = self[-1]
+        full_byte = 0xFF if last else 0x00
+        count = 0
+        while count < self._len:
+            position = self._position(self._len - 1 - count)
+            # Cả byte chứa 8 kết quả giống kết quả cuối: bỏ qua 8 kết quả một lần
+            if position & 7 == 7 and self._len - count >= 8 and self._bits[position >> 3] == full_byte:
+                count += 8
+            elif self._bits[position >> 3] >> (position & 7) & 1 == last:
+                count += 1
+            else:
+                break
+        return count
+
+    def nbytes(self):
+        """Bytes used by the packed results."""
+        return len(self._bits)
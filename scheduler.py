@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import time
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class Timer:
+    """Handle of a scheduled callback (pass to RoundScheduler.cancel)."""
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class RoundScheduler:
+    """
+    One timer heap for every round deadline and countdown tick in the bot.
+
+    Times are on the monotonic clock, so a wall-clock jump can't shorten or
+    stretch a round. A single task sleeps until the earliest timer is due
+    (or an earlier one is added) and then runs everything that is due;
+    coroutine callbacks are started as tasks so one slow callback never
+    delays the others.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.fired = 0
+        self.wakeups = 0
+
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._callbacks = set()  # Task của các callback coroutine đang chạy (giữ tham chiếu để không bị GC)
+
+    def now(self):
+        return self.clock()
+
+    def call_at(self, when, callback, *args):
+        """Run callback(*args) at monotonic time `when`; returns a Timer."""
+        timer = Timer(when, callback, args)
+        heapq.heappush(self._heap, (when, next(self._seq), timer))
+        self._start()
+        if self._heap[0][2] is timer:
+            # Timer mới đến hạn sớm nhất: đánh thức để tính lại thời gian ngủ
+            self._wakeup.set()
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        """Run callback(*args) after `delay` seconds; returns a Timer."""
+        return self.call_at(self.clock() + delay, callback, *args)
+
+    def cancel(self, timer):
+        """Cancel a timer (it is discarded when it reaches the top of the heap)."""
+        timer.cancelled = True
+
+    def _start(self):
+        """Start the scheduler task on first use (needs a running event loop)."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - self.clock()
+            if delay > 0:
+                # Không dùng wait_for: trên Python 3.11 nó có thể nuốt việc hủy task
+                # khi event được set cùng lúc (timer mới sớm hơn ngay trước khi tắt bot)
+                try:
+                    async with asyncio.timeout(delay):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    pass
+                except asyncio.CancelledError:
+                    raise
+                continue
+
+            self.wakeups += 1
+            now = self.clock()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, timer = heapq.heappop(self._heap)
+                if not timer.cancelled:
+                    self._fire(timer)
+
+    def _fire(self, timer):
+        self.fired += 1
+        try:
+            result = timer.callback(*timer.args)
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._callbacks.add(task)
+                task.add_done_callback(self._callback_done)
+        except Exception as e:
+            logger.error(f"Scheduled callback {timer.callback.__name__} failed: {e}")
+
+    def _callback_done(self, task):
+        self._callbacks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Scheduled task failed: {task.exception()}")
+
+    def __len__(self):
+        return sum(1 for _, _, timer in self._heap if not timer.cancelled)
+
+    def close(self):
+        """Stop the scheduler; pending timers are discarded and running callbacks cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._callbacks:
+            task.cancel()
+        self._callbacks.clear()
+        self._heap.clear()
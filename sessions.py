@@ -0,0 +1,138 @@
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from config import BETTING_WINDOW, RECENT_BETS_SIZE
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class Bet:
+    """One player's bet in a round."""
+    user_id: str
+    username: str
+    amount: int
+    type: str  # "Tài" hoặc "Xỉu"
+    time: datetime
+
+
+@dataclass(slots=True)
+class Session:
+    """
+    One Tài Xỉu round. Bets are keyed by user_id (one bet per player). The
+    per-side totals and counts, and the RECENT_BETS_SIZE most recent bets
+    (oldest first), are kept up to date as bets are placed, so rendering the
+    embed never has to walk every bet.
+    """
+    id: str
+    channel_id: int
+    start_time: datetime
+    deadline: float  # Hạn đặt cược, theo đồng hồ monotonic (time.monotonic)
+    bets: dict = field(default_factory=dict)  # {user_id: Bet}
+    recent_bets: OrderedDict = field(default_factory=OrderedDict)  # {user_id: Bet}, cũ -> mới
+    result: str = None
+    dice_values: list = None
+    total: int = None
+    seed: str = None
+    md5_hash: str = None
+    message: object = None
+    renderer: object = None  # SessionRenderer, gắn bởi TaiXiuGame
+    warning_message: str = ""
+    tai_total: int = 0
+    xiu_total: int = 0
+    tai_count: int = 0
+    xiu_count: int = 0
+
+    def set_bet(self, bet):
+        """Add a bet, replacing the player's previous bet in this round."""
+        old_bet = self.bets.get(bet.user_id)
+        if old_bet is not None:
+            self._count(old_bet, -1)
+        self.bets[bet.user_id] = bet
+        self._count(bet, 1)
+
+        self.recent_bets.pop(bet.user_id, None)
+        self.recent_bets[bet.user_id] = bet
+        if len(self.recent_bets) > RECENT_BETS_SIZE:
+            self.recent_bets.popitem(last=False)
+
+    def _count(self, bet, sign):
+        if bet.type == "Tài":
+            self.tai_total += sign * bet.amount
+            self.tai_count += sign
+        else:
+            self.xiu_total += sign * bet.amount
+            self.xiu_count += sign
+
+
+class SessionRegistry:
+    """
+    Active Tài Xỉu rounds, indexed both by session id and by channel.
+
+    Lookups by either key are O(1) and a channel can have at most one active
+    round. Session ids come from a counter that never goes backwards, so they
+    stay unique even after sessions are removed.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_channel = {}
+        self._ids = itertools.count(1)
+
+    def open(self, channel_id, deadline=None, message=None, session_id=None):
+        """
+        Create and register a new round in a channel; None if one is already
+        running there. `deadline` is a time.monotonic() value (default: now + BETTING_WINDOW).
+        `session_id` is only given when restoring a round from the journal.
+        """
+        if channel_id in self._by_channel:
+            return None
+
+        if session_id is None:
+            session_id = f"session_{next(self._ids)}_{time.time_ns() // 1_000_000}"
+        if deadline is None:
+            deadline = time.monotonic() + BETTING_WINDOW
+        session = Session(
+            id=session_id,
+            channel_id=channel_id,
+            start_time=datetime.now(),
+            deadline=deadline,
+            message=message
+        )
+
+        self._by_id[session_id] = session
+        self._by_channel[channel_id] = session
+        return session
+
+    def get(self, session_id):
+        """Return the session with this id, or None."""
+        return self._by_id.get(session_id)
+
+    def for_channel(self, channel_id):
+        """Return the active session of a channel, or None."""
+        return self._by_channel.get(channel_id)
+
+    def close(self, session_id):
+        """Remove a session; returns it, or None if it was not registered."""
+        session = self._by_id.pop(session_id, None)
+        if session is None:
+            return None
+        if self._by_channel.get(session.channel_id) is session:
+            del self._by_channel[session.channel_id]
+        if session.renderer is not None:
+            session.renderer.close()
+        return session
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, session_id):
+        return session_id in self._by_id
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
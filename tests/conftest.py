@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture
+def game_dir(tmp_path, monkeypatch):
+    # Database và journal của TaiXiuGame dùng đường dẫn tương đối: chạy trong thư mục tạm
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,44 @@
+"""Stand-ins for the parts of discord.py objects that TaiXiuGame uses."""
+
+
+class FakeMessage:
+    id = 99
+
+    async def edit(self, embed):
+        return self
+
+
+class FakeResponse:
+    def __init__(self, on_send=None):
+        self.on_send = on_send
+
+    async def send_message(self, *args, **kwargs):
+        if self.on_send is not None:
+            await self.on_send()
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        self.messages.append(content)
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"u{user_id}"
+
+
+class FakeInteraction:
+    """The parts of discord.Interaction that TaiXiuGame uses."""
+
+    def __init__(self, user_id, channel_id=7, on_send=None):
+        self.channel_id = channel_id
+        self.user = FakeUser(user_id)
+        self.response = FakeResponse(on_send)
+        self.followup = FakeFollowup()
+
+    async def original_response(self):
+        return FakeMessage()
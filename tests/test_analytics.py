@@ -0,0 +1,41 @@
+import random
+
+import numpy as np
+import pytest
+
+from analytics import GameAnalytics
+from config import ANALYTICS_MAX_ORDER, TAI_MIN
+
+
+def analytics_of(results):
+    """GameAnalytics over a list of "T"/"X" results (dice chosen to match)."""
+    rows = []
+    for result in results:
+        dice = [6, 5, 4] if result == "T" else [1, 2, 3]
+        total = sum(dice)
+        rows.append([int(total >= TAI_MIN), total, *dice])
+    analytics = GameAnalytics()
+    analytics.extend(np.array(rows, dtype=np.int64), len(rows))
+    return analytics
+
+
+@pytest.mark.parametrize("count", [0, 1, 5, 6])
+def test_transitions_on_history_not_longer_than_order(count):
+    transitions = analytics_of("TXTTXT"[:count]).transitions(order=6)
+    assert len(transitions["states"]) == 2 ** 6
+    assert all(state["count"] == 0 for state in transitions["states"].values())
+
+
+def test_transitions_match_counting():
+    rng = random.Random(25)
+    results = "".join(rng.choice("TX") for _ in range(500))
+    analytics = analytics_of(results)
+    for order in range(1, ANALYTICS_MAX_ORDER + 1):
+        states = analytics.transitions(order)["states"]
+        expected = {}
+        for end in range(order, len(results)):
+            key = results[end - order:end]
+            expected.setdefault(key, {"Tài": 0, "Xỉu": 0})
+            expected[key]["Tài" if results[end] == "T" else "Xỉu"] += 1
+        for key, state in states.items():
+            assert state["next"] == expected.get(key, {"Tài": 0, "Xỉu": 0})
@@ -0,0 +1,45 @@
+import sqlite3
+
+from archive import HistoryArchive, archive_history
+from database import Database
+
+
+def test_archived_games_keep_round_id(tmp_path):
+    db = Database(str(tmp_path / "tai_xiu.db"), str(tmp_path / "tai_xiu_archive.db"))
+    archive = HistoryArchive(db.archive_path)
+    try:
+        db.get_or_create_player("1", "u1")
+        for round_id in ("r1", "r2"):
+            db.settle_game("seed", "hash", [6, 5, 4], 15, "Tài", [("1", 10000, "Tài", 10000)],
+                           round_id=round_id)
+        assert archive_history(db, archive, keep_games=0) == 2
+    finally:
+        archive.close()
+        db.close()
+
+    with sqlite3.connect(tmp_path / "tai_xiu_archive.db") as conn:
+        rows = conn.execute("SELECT round_id FROM game_history ORDER BY id").fetchall()
+    assert rows == [("r1",), ("r2",)]
+
+
+def test_archive_created_before_round_id_is_upgraded(tmp_path):
+    path = tmp_path / "tai_xiu_archive.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            """CREATE TABLE game_history (
+                   id INTEGER PRIMARY KEY, seed TEXT NOT NULL, md5_hash TEXT NOT NULL,
+                   total_value INTEGER NOT NULL, result TEXT NOT NULL, created_at TIMESTAMP,
+                   dice1 INTEGER NOT NULL, dice2 INTEGER NOT NULL, dice3 INTEGER NOT NULL
+               )"""
+        )
+        conn.execute("INSERT INTO game_history VALUES (1, 's', 'h', 15, 'Tài', NULL, 6, 5, 4)")
+
+    HistoryArchive(str(path)).close()
+    # Mở lại lần nữa: không ALTER hai lần
+    archive = HistoryArchive(str(path))
+    archive.close()
+
+    with sqlite3.connect(path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(game_history)")]
+        assert columns[-1] == "round_id"
+        assert conn.execute("SELECT round_id FROM game_history").fetchall() == [(None,)]
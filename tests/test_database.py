@@ -0,0 +1,75 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from async_database import AsyncDatabase
+import database
+from database import Database
+from player_cache import PlayerCache
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "tai_xiu.db"), str(tmp_path / "tai_xiu_archive.db"))
+    yield database
+    database.close()
+
+
+def test_settle_game_returns_absolute_reserved(db):
+    player = db.get_or_create_player("1", "u1")
+    # Người chơi cược ở hai kênh: chỉ tiền giữ của phiên được thanh toán được giải phóng
+    assert db.reserve_funds("1", 10000) == 10000
+    assert db.reserve_funds("1", 20000) == 30000
+
+    game_id, new_balances, reserved = db.settle_game(
+        "seed", "hash", [6, 5, 4], 15, "Tài", [("1", 10000, "Tài", 10000)], round_id="r1"
+    )
+    assert new_balances == {"1": player["balance"] + 10000}
+    assert reserved == {"1": 20000}
+    assert db.settle_game("seed", "hash", [6, 5, 4], 15, "Tài", [("1", 10000, "Tài", 10000)],
+                          round_id="r1") is None
+
+    # Bản trong bộ nhớ cũ hơn database vẫn nhận đúng giá trị sau khi thanh toán
+    cache = PlayerCache()
+    cache.put({"user_id": "1", "username": "u1", "balance": player["balance"], "reserved": 10000})
+    cache.update("1", balance=new_balances["1"], reserved=reserved["1"])
+    assert cache.get("1")["reserved"] == 20000
+
+
+def test_settlement_survives_leaderboard_refresh_failure(db, monkeypatch):
+    db.get_or_create_player("1", "u1")
+    assert db.reserve_funds("1", 10000) == 10000
+
+    def broken_query(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(db, "_query_leaderboard", broken_query)
+    settled = asyncio.run(AsyncDatabase(db).settle_game(
+        "seed", "hash", [1, 1, 1], 3, "Xỉu", [("1", 10000, "Tài", -10000)], round_id="r1"
+    ))
+    assert settled is not None
+    assert settled[2] == {"1": 0}
+    assert db._leaderboard_cache is None
+
+
+def test_new_player_shows_up_on_cached_leaderboard(db):
+    db.get_or_create_player("1", "u1")
+    db.settle_game("seed", "hash", [1, 1, 1], 3, "Xỉu", [("1", 10000, "Tài", -10000)])
+    assert [player["user_id"] for player in db.get_leaderboard()] == ["1"]
+
+    # Cache ngắn hơn LEADERBOARD_CACHE_SIZE được coi là toàn bộ người chơi
+    db.get_or_create_player("2", "u2")
+    assert [player["user_id"] for player in db.get_leaderboard()] == ["2", "1"]
+    assert db.get_player_rank("2")["rank"] == 1
+
+
+def test_new_player_enters_full_leaderboard_cache(db, monkeypatch):
+    monkeypatch.setattr(database, "LEADERBOARD_CACHE_SIZE", 2)
+    for user_id in ("1", "2", "3"):
+        db.get_or_create_player(user_id, f"u{user_id}")
+    db.settle_game("seed", "hash", [1, 1, 1], 3, "Xỉu",
+                   [(user_id, 10000, "Tài", -10000) for user_id in ("1", "2", "3")])
+
+    db.get_or_create_player("4", "u4")
+    assert db.get_leaderboard(limit=1)[0]["user_id"] == "4"
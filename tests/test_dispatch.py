@@ -0,0 +1,33 @@
+import asyncio
+
+from dispatch import DiscordDispatcher, PRIORITY_BET, PRIORITY_COUNTDOWN
+
+
+class FakeMessage:
+    def __init__(self, message_id, started):
+        self.id = message_id
+        self.started = started
+
+    async def edit(self, embed):
+        self.started.set()
+        await asyncio.sleep(100)
+        return self
+
+
+def test_close_cancels_running_and_queued_operations():
+    async def main():
+        dispatcher = DiscordDispatcher(workers=1)
+        started = asyncio.Event()
+        running = dispatcher.edit(FakeMessage(1, started), "embed", PRIORITY_BET)
+        queued = [dispatcher.edit(FakeMessage(i, started), "embed", PRIORITY_COUNTDOWN) for i in (2, 3)]
+        await started.wait()
+        workers = list(dispatcher._tasks)
+
+        dispatcher.close()
+        assert dispatcher.depth() == 0
+        assert all(future.cancelled() for future in queued)
+        done, _ = await asyncio.wait(workers, timeout=1)
+        await asyncio.sleep(0)
+        return len(done) == len(workers) and running.cancelled()
+
+    assert asyncio.run(asyncio.wait_for(main(), 5))
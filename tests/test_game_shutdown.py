@@ -0,0 +1,17 @@
+import asyncio
+
+from game import TaiXiuGame
+
+
+def test_close_stops_round_scheduler(game_dir):
+    async def main():
+        game = TaiXiuGame(bot=None)
+        session = game._open_session(channel_id=1)
+        game._schedule_round(session)
+        await asyncio.sleep(0)
+        task = game.scheduler._task
+        game.close()
+        done, _ = await asyncio.wait({task}, timeout=1)
+        return task in done and task.cancelled() and len(game.scheduler) == 0
+
+    assert asyncio.run(asyncio.wait_for(main(), 5))
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from datetime import datetime
+
+from discord_fakes import FakeInteraction, FakeMessage
+from game import TaiXiuGame
+from journal import RoundJournal, replay_journal, snapshot_sessions
+from sessions import Bet, SessionRegistry
+
+
+def test_round_journaled_before_its_message(tmp_path):
+    path = str(tmp_path / "rounds.journal")
+    journal = RoundJournal(path)
+    bet = Bet("1", "u1", 10000, "Tài", datetime.now())
+    journal.record_open(1, 7, None, time.time() + 30)
+    journal.record_bet(1, bet)
+    rounds = replay_journal(path)
+    assert rounds[1]["message"] is None
+    assert rounds[1]["bets"]["1"]["amount"] == 10000
+
+    journal.record_message(1, 99)
+    journal.close()
+    rounds = replay_journal(path)
+    assert rounds[1]["message"] == 99
+    assert list(rounds[1]["bets"]) == ["1"]
+
+
+def test_compaction_keeps_rounds_without_message(tmp_path):
+    path = str(tmp_path / "rounds.journal")
+    sessions = SessionRegistry()
+    session = sessions.open(7, deadline=time.monotonic() + 30)
+    session.set_bet(Bet("1", "u1", 10000, "Xỉu", datetime.now()))
+
+    journal = RoundJournal(path)
+    journal.compact(snapshot_sessions(sessions))
+    journal.close()
+    rounds = replay_journal(path)
+    assert rounds[session.id]["message"] is None
+    assert rounds[session.id]["bets"]["1"]["type"] == "Xỉu"
+
+
+def test_bet_placed_while_round_message_is_sent_is_journaled(game_dir):
+    async def main():
+        game = TaiXiuGame(bot=None)
+        accepted = []
+
+        async def bet_during_send():
+            # Cược của người khác đến trong lúc chờ Discord gửi tin nhắn của phiên
+            accepted.append(await game.place_bet(FakeInteraction(2), 10000, "Tài"))
+
+        session_id = await game.start_session(FakeInteraction(1, on_send=bet_during_send))
+        # Bot dừng trước khi phiên kết thúc
+        game.close()
+        return session_id, accepted
+
+    session_id, accepted = asyncio.run(main())
+    assert accepted == [True]
+    rounds = replay_journal(str(game_dir / "tai_xiu_rounds.journal"))
+    assert rounds[session_id]["message"] == FakeMessage.id
+    assert rounds[session_id]["bets"]["2"]["amount"] == 10000
@@ -0,0 +1,33 @@
+import sqlite3
+import threading
+
+from database import Database
+from migrations import MIGRATIONS
+
+
+def test_concurrent_open_applies_each_migration_once(tmp_path):
+    # Bốn tiến trình/luồng mở cùng một database mới (ví dụ nhiều worker gunicorn)
+    path = str(tmp_path / "tai_xiu.db")
+    archive_path = str(tmp_path / "tai_xiu_archive.db")
+    barrier = threading.Barrier(4)
+    databases, errors = [], []
+
+    def open_database():
+        barrier.wait()
+        try:
+            databases.append(Database(path, archive_path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_database) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for database in databases:
+        database.close()
+
+    assert errors == []
+    with sqlite3.connect(path) as conn:
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == [version for version, _, _ in MIGRATIONS]
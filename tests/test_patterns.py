@@ -0,0 +1,28 @@
+import random
+
+from benchmarks.bench_pattern_analyzer import builtin_patterns, random_sequence, reference_patterns
+from patterns import PatternAnalyzer
+
+RANDOM_SEQUENCES = 300
+MAX_SEQUENCE_LENGTH = 60
+
+
+def test_incremental_analyzer_matches_rescanning_reference():
+    """After every append_result, analyze_patterns agrees with the old rescanning detectors."""
+    rng = random.Random(21)
+    hits = dict.fromkeys(reference_patterns([]), 0)
+    for _ in range(RANDOM_SEQUENCES):
+        sequence = random_sequence(rng, rng.randint(0, MAX_SEQUENCE_LENGTH))
+        analyzer = PatternAnalyzer()
+        for i, result in enumerate(sequence):
+            analyzer.append_result(result)
+            expected = reference_patterns(sequence[:i + 1])
+            assert builtin_patterns(analyzer) == expected, sequence[:i + 1]
+            for name, value in expected.items():
+                if value not in (0, False, (0, None)):
+                    hits[name] += 1
+        # set_history() phải cho cùng trạng thái với việc thêm từng kết quả
+        assert builtin_patterns(PatternAnalyzer(sequence)) == reference_patterns(sequence), sequence
+
+    # Các chuỗi ngẫu nhiên phải thực sự chạm tới mọi mẫu
+    assert all(hits.values()), hits
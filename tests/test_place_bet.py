@@ -0,0 +1,73 @@
+import asyncio
+
+from config import DEFAULT_BALANCE, MAX_BET
+from discord_fakes import FakeInteraction
+from game import TaiXiuGame
+
+
+def run_game(scenario):
+    """Run scenario(game) in an event loop with a fresh game, then close the game."""
+    async def main():
+        game = TaiXiuGame(bot=None)
+        try:
+            return await scenario(game)
+        finally:
+            game.close()
+    return asyncio.run(main())
+
+
+async def bet(game, user_id, amount, bet_type, channel_id=7):
+    interaction = FakeInteraction(user_id, channel_id)
+    accepted = await game.place_bet(interaction, amount, bet_type)
+    return accepted, interaction.followup.messages
+
+
+def test_raising_a_bet_checks_only_the_extra_stake(game_dir):
+    async def scenario(game):
+        for channel_id in (7, 8):
+            await game.start_session(FakeInteraction(0, channel_id))
+        # Kênh 8 giữ 300k: còn 700k khả dụng
+        assert (await bet(game, 1, 300000, "Xỉu", channel_id=8))[0]
+        assert (await bet(game, 1, 400000, "Tài"))[0]
+
+        accepted, messages = await bet(game, 1, 400000, "Tài")
+        assert not accepted
+        assert "không đủ để cược thêm 400,000" in messages[0]
+
+        # Đổi cửa: chỉ giữ thêm phần chênh lệch 600k - 400k
+        assert (await bet(game, 1, 600000, "Xỉu"))[0]
+        player = game.players.get("1")
+        assert player["reserved"] == 900000
+        assert player["balance"] == DEFAULT_BALANCE
+
+    run_game(scenario)
+
+
+def test_total_bet_in_a_round_is_capped(game_dir):
+    async def scenario(game):
+        await game.start_session(FakeInteraction(0))
+        assert (await bet(game, 1, MAX_BET - 10000, "Tài"))[0]
+
+        accepted, messages = await bet(game, 1, 20000, "Tài")
+        assert not accepted
+        assert "vượt quá giới hạn tối đa" in messages[0]
+
+        accepted, messages = await bet(game, 1, 5000, "Tài")
+        assert not accepted
+        assert "tối thiểu" in messages[0]
+
+    run_game(scenario)
+
+
+def test_concurrent_bets_of_one_player_add_up(game_dir):
+    async def scenario(game):
+        await game.start_session(FakeInteraction(0))
+        results = await asyncio.gather(*(bet(game, 1, 100000, "Tài") for _ in range(3)))
+        assert [accepted for accepted, _ in results] == [True] * 3
+
+        session = game.sessions.for_channel(7)
+        assert session.bets["1"].amount == 300000
+        assert game.db.database.get_or_create_player("1", "u1")["reserved"] == 300000
+        assert game._bet_locks == {}
+
+    run_game(scenario)
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+from scheduler import RoundScheduler
+
+
+def test_timers_fire_in_deadline_order():
+    async def main():
+        scheduler = RoundScheduler()
+        fired = []
+        scheduler.call_later(0.03, fired.append, "late")
+        scheduler.call_later(0.01, fired.append, "early")
+        cancelled = scheduler.call_later(0.02, fired.append, "cancelled")
+        scheduler.cancel(cancelled)
+        await asyncio.sleep(0.1)
+        scheduler.close()
+        return fired
+
+    assert asyncio.run(main()) == ["early", "late"]
+
+
+def test_cancel_right_after_new_earliest_timer():
+    # Timer mới sớm hơn set event trong cùng tick với cancel: task vẫn phải dừng
+    async def main():
+        scheduler = RoundScheduler()
+        scheduler.call_later(100, lambda: None)
+        await asyncio.sleep(0.01)
+        scheduler.call_later(50, lambda: None)
+        task = scheduler._task
+        task.cancel()
+        done, _ = await asyncio.wait({task}, timeout=1)
+        return task in done and task.cancelled()
+
+    assert asyncio.run(asyncio.wait_for(main(), 5))
+
+
+def test_asyncio_run_returns_with_pending_timers():
+    async def main():
+        scheduler = RoundScheduler()
+        scheduler.call_later(100, lambda: None)
+        await asyncio.sleep(0.01)
+        scheduler.call_later(50, lambda: None)
+
+    # asyncio.run hủy mọi task còn lại khi main() trả về (như khi discord.py tắt);
+    # chạy trong thread để test báo lỗi thay vì treo nếu việc hủy bị nuốt
+    runner = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+    runner.start()
+    runner.join(5)
+    assert not runner.is_alive()
+
+
+def test_running_callbacks_are_kept_and_cancelled_on_close():
+    async def main():
+        scheduler = RoundScheduler()
+        started = asyncio.Event()
+
+        async def slow_callback():
+            started.set()
+            await asyncio.sleep(100)
+
+        scheduler.call_later(0, slow_callback)
+        await started.wait()
+        # Scheduler giữ tham chiếu tới task của callback đang chạy
+        running = list(scheduler._callbacks)
+        assert len(running) == 1
+
+        scheduler.close()
+        done, _ = await asyncio.wait(running, timeout=1)
+        return running[0] in done and running[0].cancelled() and not scheduler._callbacks
+
+    assert asyncio.run(asyncio.wait_for(main(), 5))
+
+
+def test_finished_callbacks_are_released():
+    async def main():
+        scheduler = RoundScheduler()
+        fired = asyncio.Event()
+
+        async def callback():
+            fired.set()
+
+        scheduler.call_later(0, callback)
+        await fired.wait()
+        await asyncio.sleep(0)
+        remaining = len(scheduler._callbacks)
+        scheduler.close()
+        return remaining
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == 0
@@ -1,9 +1,14 @@
 import os
+import atexit
 import logging
 import threading
 import time
 from flask import Flask, render_template, jsonify, request, redirect, url_for, flash
+from analytics import GameAnalytics
+from config import ANALYTICS_ROLLING_WINDOW, ANALYTICS_MAX_POINTS
 from database import Database
+from history_queries import clamp_page_size
+from pattern_index import PatternIndex, parse_results
 from patterns import PatternAnalyzer
 from utils import format_currency
 
@@ -18,19 +23,28 @@ app.secret_key = os.environ.get("SESSION_SECRET", "default_session_secret")
 
 # Database 
 db_handler = Database()
+atexit.register(db_handler.close)
 
-# Pattern analyzer
-pattern_analyzer = PatternAnalyzer()
+# Chỉ mục chuỗi kết quả cho /api/patterns/search: xây một lần, đọc thêm các ván mới khi tra cứu
+pattern_index = PatternIndex()
+pattern_index_lock = threading.Lock()
+
+# Thống kê toàn bộ lịch sử (NumPy), tính lại chỉ khi có ván mới
+game_analytics = GameAnalytics(db_handler)
+analytics_lock = threading.Lock()
+
+def _analyze_patterns(game_history):
+    """Patterns at the tail of a newest-first game history page."""
+    # Mỗi request một PatternAnalyzer: trạng thái của nó không dùng chung giữa các luồng
+    return PatternAnalyzer([game['result'] for game in reversed(game_history)]).analyze_patterns()
 
 @app.route('/')
 def home():
     # Get recent game history
     game_history = db_handler.get_game_history(20)  # Get last 20 games
     
-    # Load patterns from history
-    results = [game['result'] for game in game_history]
-    pattern_analyzer.set_history(results)
-    patterns = pattern_analyzer.analyze_patterns()
+    # Load patterns from history (database trả về ván mới nhất trước)
+    patterns = _analyze_patterns(game_history)
     
     # Reverse the history to show newest first
     game_history.reverse()
@@ -54,22 +68,17 @@ def home():
 
 @app.route('/players')
 def players():
-    # Get all players
-    conn = db_handler.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM players ORDER BY balance DESC")
-    players = [dict(row) for row in cursor.fetchall()]
+    # Leaderboard page (keyset pagination on the balance index)
+    limit, after_balance, after_user_id = _leaderboard_args()
+    players = db_handler.get_leaderboard(limit, after_balance, after_user_id)
     
-    return render_template('players.html', players=players)
+    return render_template('players.html', players=players,
+                          next_cursor=_leaderboard_cursor(players, limit))
 
 @app.route('/player/<user_id>')
 def player_details(user_id):
-    # Get player
-    conn = db_handler.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM players WHERE user_id = ?", (user_id,))
-    player_row = cursor.fetchone()
-    player = dict(player_row) if player_row else None
+    # Get player with lifetime statistics (one primary-key lookup)
+    player = db_handler.get_player_stats(user_id)
     
     if not player:
         flash('Player not found', 'error')
@@ -78,88 +87,161 @@ def player_details(user_id):
     # Get player bet history
     bet_history = db_handler.get_player_bet_history(user_id)
     
-    # Calculate stats
-    win_count = len([b for b in bet_history if b['result'] == 'win'])
-    loss_count = len([b for b in bet_history if b['result'] == 'loss'])
-    total_bets = win_count + loss_count
-    
-    win_rate = (win_count / total_bets * 100) if total_bets > 0 else 0
-    
-    total_win = sum([b['win_amount'] for b in bet_history if b['result'] == 'win'])
-    total_loss = sum([abs(b['win_amount']) for b in bet_history if b['result'] == 'loss'])
-    
-    net_profit = total_win - total_loss
-    
     return render_template('player_details.html',
                           player=player,
                           bet_history=bet_history,
-                          win_count=win_count,
-                          loss_count=loss_count,
-                          total_bets=total_bets,
-                          win_rate=win_rate,
-                          total_win=total_win,
-                          total_loss=total_loss,
-                          net_profit=net_profit,
+                          win_count=player['win_count'],
+                          loss_count=player['loss_count'],
+                          total_bets=player['total_bets'],
+                          win_rate=player['win_rate'],
+                          total_win=player['total_won'],
+                          total_loss=player['total_lost'],
+                          net_profit=player['net_profit'],
                           format_currency=format_currency)
 
 @app.route('/stats')
 def stats():
-    # Get all games
-    conn = db_handler.get_connection()
-    cursor = conn.cursor()
-    
-    # Total games
-    cursor.execute("SELECT COUNT(*) as count FROM game_history")
-    total_games = cursor.fetchone()['count']
-    
-    # Tài vs Xỉu distribution
-    cursor.execute("SELECT result, COUNT(*) as count FROM game_history GROUP BY result")
-    result_distribution = {row['result']: row['count'] for row in cursor.fetchall()}
-    
-    # Dice value distribution
-    cursor.execute("SELECT dice_values FROM game_history")
-    all_dice = cursor.fetchall()
-    
-    dice_distribution = {i: 0 for i in range(1, 7)}
-    for game in all_dice:
-        dice_list = json.loads(game['dice_values'])
-        for die in dice_list:
-            dice_distribution[die] = dice_distribution.get(die, 0) + 1
-    
-    # Total value distribution
-    cursor.execute("SELECT total_value, COUNT(*) as count FROM game_history GROUP BY total_value ORDER BY total_value")
-    total_distribution = {row['total_value']: row['count'] for row in cursor.fetchall()}
+    # Overall statistics (maintained incrementally in rollup tables)
+    game_stats = db_handler.get_stats()
     
     # Recent pattern occurrence
     game_history = db_handler.get_game_history(50)
-    results = [game['result'] for game in game_history]
-    
-    pattern_analyzer.set_history(results)
-    patterns = pattern_analyzer.analyze_patterns()
+    patterns = _analyze_patterns(game_history)
     
     return render_template('stats.html',
-                          total_games=total_games,
-                          result_distribution=result_distribution,
-                          dice_distribution=dice_distribution,
-                          total_distribution=total_distribution,
+                          total_games=game_stats['total_games'],
+                          result_distribution=game_stats['result_distribution'],
+                          dice_distribution=game_stats['dice_distribution'],
+                          total_distribution=game_stats['total_distribution'],
                           patterns=patterns)
 
+def _page_args():
+    """Read limit / before_id / after_id from the query string (limit is capped)."""
+    limit = clamp_page_size(request.args.get('limit', 50, type=int))
+    before_id = request.args.get('before_id', type=int)
+    after_id = request.args.get('after_id', type=int)
+    return limit, before_id, after_id
+
+def _include_archive():
+    """?include_archive=1 also searches games moved to the archive database."""
+    return request.args.get('include_archive', 0, type=int) == 1
+
+def _page_response(key, rows, limit, before_id, after_id):
+    """Build a JSON page with the cursor to pass back for the next page."""
+    next_cursor = None
+    if len(rows) == limit:
+        # Đi tới các dòng mới hơn nếu đang phân trang bằng after_id, ngược lại đi về dòng cũ hơn
+        if after_id is not None and before_id is None:
+            next_cursor = {"after_id": rows[0]['id']}
+        else:
+            next_cursor = {"before_id": rows[-1]['id']}
+    return jsonify({key: rows, "next_cursor": next_cursor})
+
+def _leaderboard_args():
+    """Read limit / after_balance / after_user_id from the query string (limit is capped)."""
+    limit = clamp_page_size(request.args.get('limit', 50, type=int))
+    after_balance = request.args.get('after_balance', type=int)
+    after_user_id = request.args.get('after_user_id')
+    return limit, after_balance, after_user_id
+
+def _leaderboard_cursor(players, limit):
+    """Cursor of the next leaderboard page, or None on the last page."""
+    if len(players) < limit:
+        return None
+    return {"after_balance": players[-1]['balance'], "after_user_id": players[-1]['user_id']}
+
+@app.route('/api/leaderboard')
+def api_leaderboard():
+    limit, after_balance, after_user_id = _leaderboard_args()
+    players = db_handler.get_leaderboard(limit, after_balance, after_user_id)
+    return jsonify({"players": players, "next_cursor": _leaderboard_cursor(players, limit)})
+
+@app.route('/api/player/<user_id>/rank')
+def api_player_rank(user_id):
+    rank = db_handler.get_player_rank(user_id)
+    if rank is None:
+        return jsonify({"error": "Player not found"}), 404
+    return jsonify(rank)
+
 @app.route('/api/game_history')
 def api_game_history():
-    limit = request.args.get('limit', 50, type=int)
-    game_history = db_handler.get_game_history(limit)
-    return jsonify(game_history)
+    limit, before_id, after_id = _page_args()
+    game_history = db_handler.get_game_history(limit, before_id, after_id, _include_archive())
+    return _page_response('games', game_history, limit, before_id, after_id)
+
+@app.route('/api/player/<user_id>/bets')
+def api_player_bets(user_id):
+    limit, before_id, after_id = _page_args()
+    bet_history = db_handler.get_player_bet_history(user_id, limit, before_id, after_id,
+                                                    _include_archive())
+    return _page_response('bets', bet_history, limit, before_id, after_id)
 
 @app.route('/api/patterns')
 def api_patterns():
     game_history = db_handler.get_game_history(50)
-    results = [game['result'] for game in game_history]
-    
-    pattern_analyzer.set_history(results)
-    patterns = pattern_analyzer.analyze_patterns()
+    patterns = _analyze_patterns(game_history)
     
     return jsonify(patterns)
 
+def _refresh_pattern_index():
+    """Index the games saved since the last search (the whole history on first use)."""
+    new_games = db_handler.iter_game_results(pattern_index.last_game_id)
+    if pattern_index.count:
+        for game_id, result in new_games:
+            pattern_index.append(result, game_id)
+    else:
+        pattern_index.build(new_games)
+
+@app.route('/api/patterns/search')
+def api_patterns_search():
+    # ?q=TTXT: số lần chuỗi xuất hiện trong toàn bộ lịch sử và kết quả ván tiếp theo
+    try:
+        bits = parse_results(request.args.get('q', ''))
+        with pattern_index_lock:
+            _refresh_pattern_index()
+            found = pattern_index.search(bits)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(found)
+
+def _analytics_response(compute):
+    """Load new games into the shared GameAnalytics and return compute(analytics) as JSON."""
+    try:
+        with analytics_lock:
+            game_analytics.refresh()
+            return jsonify(compute(game_analytics))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/analytics/summary')
+def api_analytics_summary():
+    return _analytics_response(lambda analytics: analytics.summary())
+
+@app.route('/api/analytics/streaks')
+def api_analytics_streaks():
+    return _analytics_response(lambda analytics: analytics.streaks())
+
+@app.route('/api/analytics/transitions')
+def api_analytics_transitions():
+    # ?order=2: xác suất ván tiếp theo theo 2 ván trước đó
+    order = request.args.get('order', 1, type=int)
+    return _analytics_response(lambda analytics: analytics.transitions(order))
+
+@app.route('/api/analytics/rolling')
+def api_analytics_rolling():
+    window = request.args.get('window', ANALYTICS_ROLLING_WINDOW, type=int)
+    points = request.args.get('points', ANALYTICS_MAX_POINTS, type=int)
+    return _analytics_response(lambda analytics: analytics.rolling_tai_rate(window, points))
+
+@app.route('/api/analytics/totals')
+def api_analytics_totals():
+    return _analytics_response(lambda analytics: analytics.totals())
+
+@app.route('/api/analytics/fairness')
+def api_analytics_fairness():
+    return _analytics_response(lambda analytics: analytics.fairness())
+
 @app.errorhandler(404)
 def page_not_found(e):
     return render_template('404.html'), 404
\ No newline at end of file